@@ -148,9 +148,26 @@ def process_and_filter(feature):
         None # This drops the feature if it is too small
     )
 
+# Same filter, but keeps a simplified flood polygon instead of only its centroid
+# (ingested by the backend with backend/load_flood_polygons.py)
+SIMPLIFY_METERS = 100
+
+def process_and_keep_polygon(feature):
+    area = feature.geometry().area(10).divide(1e6)
+    return ee.Algorithms.If(
+        area.gt(MIN_AREA_SQKM),
+        ee.Feature(feature.geometry().simplify(SIMPLIFY_METERS)).set({
+            'polygon_id': feature.id(),
+            'area_sqkm': area,
+            'date': after_end.strftime('%Y-%m-%d')
+        }),
+        None
+    )
+
 # Map the function and drop the Nulls (the small areas)
 print("Filtering noise (removing small areas < 0.05 sqkm)...")
 flood_centroids = vectors.map(process_and_filter, dropNulls=True)
+flood_polygons = vectors.map(process_and_keep_polygon, dropNulls=True)
 
 # =============================================================================
 # 5. EXPORT
@@ -161,5 +178,12 @@ print("Downloading data...")
 try:
     geemap.ee_to_csv(flood_centroids, filename=out_csv)
     print(f"Success! Data saved to {out_csv}")
+except Exception as e:
+    print(f"Error: {e}")
+
+out_geojson = 'Karnataka_Flood_Polygons.geojson'
+try:
+    geemap.ee_to_geojson(flood_polygons, filename=out_geojson)
+    print(f"Success! Polygons saved to {out_geojson}")
 except Exception as e:
     print(f"Error: {e}")
\ No newline at end of file
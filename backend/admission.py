@@ -0,0 +1,175 @@
+"""In-process admission control: per-client rate limits, concurrency caps and
+load shedding, as plain ASGI middleware with no external store.
+
+Every request is put in a route class:
+  priority - task status updates from the field (PUT /api/tasks/{id}) and
+             volunteer location pings; never shed for load
+  auth     - signup/login (bcrypt is expensive)
+  upload   - report submission (multipart)
+  write    - any other non-GET request
+  read     - GET/HEAD
+
+Each (client, class) pair has a token bucket. The client is the JWT user_id
+when a valid bearer token is sent, otherwise the remote IP. Each class also
+has a cap on in-flight requests. When the whole process is busy, lower lanes
+are shed first: reads at 60% of MAX_IN_FLIGHT, uploads at 80%, writes and
+auth at 90%. Rejections are answered immediately: 429 for a client over its
+rate, 503 for a full or shed lane, both with Retry-After.
+
+Static files under the /uploads and /archive/uploads mounts bypass admission
+entirely; a dashboard loading report photos would otherwise drain the read
+bucket in one page view.
+
+Behind a reverse proxy (nginx, a load balancer) every anonymous request has
+the proxy's address, so all anonymous clients share one bucket per class.
+Run with TRUST_FORWARDED_FOR=1 there so the first X-Forwarded-For address is
+used instead. Leave it off when clients connect directly, since the header
+can then be set to anything.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from jose import jwt, JWTError
+import json
+import math
+import time
+import os
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") != "0"
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "256"))
+MAX_TRACKED_CLIENTS = 50000
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "0") == "1"
+EXEMPT_PREFIXES = ("/uploads/", "/archive/uploads/")   # StaticFiles mounts in main.py
+
+
+@dataclass
+class RouteClass:
+    rate: float                      # tokens per second per client
+    burst: float                     # bucket size
+    max_concurrent: Optional[int]    # in-flight cap for the class, None = uncapped
+    shed_at: Optional[float]         # fraction of MAX_IN_FLIGHT where the class is shed
+
+
+DEFAULT_CLASSES = {
+    "priority": RouteClass(rate=10, burst=50, max_concurrent=None, shed_at=None),
+    "auth": RouteClass(rate=0.2, burst=10, max_concurrent=4, shed_at=0.9),
+    "upload": RouteClass(rate=1, burst=10, max_concurrent=16, shed_at=0.8),
+    "write": RouteClass(rate=5, burst=20, max_concurrent=32, shed_at=0.9),
+    "read": RouteClass(rate=20, burst=40, max_concurrent=64, shed_at=0.6),
+}
+
+
+def classify(method, path):
+    if path.startswith("/api/auth/") and method == "POST":
+        return "auth"
+    if method == "PUT" and path.startswith("/api/tasks/"):
+        return "priority"
+    if method == "POST" and path.startswith("/api/locations/pings"):
+        return "priority"
+    if method == "POST" and path.rstrip("/") == "/api/reports":
+        return "upload"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+class TokenBuckets:
+    """Token buckets keyed by (client, class), oldest idle keys evicted first."""
+
+    def __init__(self, max_keys=MAX_TRACKED_CLIENTS, clock=time.monotonic):
+        self.buckets = OrderedDict()   # key -> [tokens, last refill]
+        self.max_keys = max_keys
+        self.clock = clock
+
+    def take(self, key, rate, burst):
+        """Spend one token. Returns 0 if allowed, else seconds until one is available."""
+        now = self.clock()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [burst, now]
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rate
+
+
+class AdmissionControl:
+    def __init__(self, app, classes=None, max_in_flight=MAX_IN_FLIGHT, secret_key=None,
+                 algorithm="HS256", clock=time.monotonic, enabled=ADMISSION_CONTROL):
+        self.app = app
+        self.classes = classes or DEFAULT_CLASSES
+        self.max_in_flight = max_in_flight
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.enabled = enabled
+        self.buckets = TokenBuckets(clock=clock)
+        self.in_flight = {name: 0 for name in self.classes}
+        self.total_in_flight = 0
+
+    def client_key(self, scope):
+        headers = dict(scope.get("headers") or [])
+        auth = headers.get(b"authorization", b"").decode("latin-1")
+        if self.secret_key and auth.lower().startswith("bearer "):
+            try:
+                payload = jwt.decode(auth[7:], self.secret_key, algorithms=[self.algorithm])
+                if payload.get("user_id"):
+                    return "user:" + payload["user_id"]
+            except JWTError:
+                pass
+        if TRUST_FORWARDED_FOR and b"x-forwarded-for" in headers:
+            return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    def admit(self, scope):
+        """(route class, None) if admitted, else (route class, (status, retry_after, detail))."""
+        name = classify(scope["method"], scope["path"])
+        route = self.classes[name]
+
+        retry = self.buckets.take((self.client_key(scope), name), route.rate, route.burst)
+        if retry:
+            return name, (429, retry, "Too many requests")
+        if route.shed_at is not None and self.total_in_flight >= route.shed_at * self.max_in_flight:
+            return name, (503, 1, "Server busy, please retry")
+        if route.max_concurrent is not None and self.in_flight[name] >= route.max_concurrent:
+            return name, (503, 1, "Too many concurrent requests of this kind")
+        return name, None
+
+    async def __call__(self, scope, receive, send):
+        if (not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or scope["path"].startswith(EXEMPT_PREFIXES)):
+            await self.app(scope, receive, send)
+            return
+
+        name, rejection = self.admit(scope)
+        if rejection:
+            status, retry_after, detail = rejection
+            await self._reject(send, status, retry_after, detail)
+            return
+
+        self.in_flight[name] += 1
+        self.total_in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[name] -= 1
+            self.total_in_flight -= 1
+
+    async def _reject(self, send, status, retry_after, detail):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
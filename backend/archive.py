@@ -0,0 +1,266 @@
+"""Hot/cold archival of closed reports and tasks.
+
+Reports resolved and tasks verified more than ARCHIVE_AFTER_DAYS ago are moved
+out of the hot tables in batches, either into the archived_* tables or into
+date-partitioned Parquet files under ARCHIVE_DIR. Their images are moved from
+uploads/ into cold storage.
+
+Run it periodically with `python run_archive.py`.
+"""
+from sqlalchemy import func, exists, and_, select
+from sqlalchemy.orm import Session
+import models
+import datetime
+import shutil
+import uuid
+import os
+
+ARCHIVE_BACKEND = os.getenv("ARCHIVE_BACKEND", "table")  # 'table' or 'parquet'
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+COLD_UPLOAD_DIR = os.path.join(ARCHIVE_DIR, "uploads")
+COLD_UPLOAD_URL = "/archive/uploads"
+UPLOAD_DIR = "uploads"
+
+REPORT_FIELDS = ["id", "title", "description", "severity", "latitude", "longitude",
+                 "status", "zone", "district", "created_at", "user_id"]
+TASK_FIELDS = ["id", "title", "description", "status", "priority", "latitude", "longitude",
+               "zone", "district", "created_at", "completed_at", "volunteer_id", "report_id"]
+
+
+def _move_image_to_cold(image_url, moved):
+    """Copy a hot upload into cold storage and return its new URL.
+
+    The hot file is only removed after the batch commits (see `moved`).
+    """
+    if not image_url.startswith("/uploads/"):
+        return image_url
+    filename = image_url.replace("/uploads/", "")
+    src = os.path.join(UPLOAD_DIR, filename)
+    if not os.path.exists(src):
+        return image_url
+    os.makedirs(COLD_UPLOAD_DIR, exist_ok=True)
+    shutil.copy2(src, os.path.join(COLD_UPLOAD_DIR, filename))
+    moved.append(src)
+    return f"{COLD_UPLOAD_URL}/{filename}"
+
+
+def _remove_hot_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except Exception as e:
+            print(f"Error deleting file {path}: {e}")
+
+
+def _partition_path(kind, day):
+    folder = os.path.join(ARCHIVE_DIR, kind, f"date={day.isoformat()}")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"part-{uuid.uuid4()}.parquet")
+
+
+def _write_parquet(kind, rows):
+    """Write rows into ARCHIVE_DIR/<kind>/date=YYYY-MM-DD/ partitions.
+
+    Files are written under a `.tmp` name and returned; `_commit` renames them
+    once the rows are deleted from the hot tables, so a failed commit never
+    leaves rows that would be archived twice.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("ARCHIVE_BACKEND=parquet requires pyarrow to be installed")
+
+    by_day = {}
+    for row in rows:
+        day = (row["created_at"] or datetime.datetime.utcnow()).date()
+        by_day.setdefault(day, []).append(row)
+    staged = []
+    try:
+        for day, day_rows in by_day.items():
+            path = _partition_path(kind, day) + ".tmp"
+            staged.append(path)
+            pq.write_table(pa.Table.from_pylist(day_rows), path)
+    except Exception:
+        _discard(staged)
+        raise
+    return staged
+
+
+def _discard(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _commit(db: Session, staged):
+    """Commit the batch, then publish its staged Parquet files (or drop them on failure)."""
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        _discard(staged)
+        raise
+    for path in staged:
+        os.replace(path, path[:-len(".tmp")])
+
+
+def _closed_tasks(db: Session, cutoff, batch_size):
+    closed_at = func.coalesce(models.Task.completed_at, models.Task.created_at)
+    return (db.query(models.Task)
+            .filter(models.Task.status == "verified")
+            .filter(closed_at < cutoff)
+            .order_by(closed_at)
+            .limit(batch_size)
+            .all())
+
+
+def _closed_reports(db: Session, cutoff, batch_size):
+    # Only reports with no remaining (non-rejected) task; verified tasks are
+    # archived first, so they no longer hold their report in the hot table.
+    has_task = exists().where(and_(models.Task.report_id == models.Report.id,
+                                   models.Task.status != "rejected"))
+    # Closed when last resolved according to the lifecycle log; reports
+    # resolved before the log existed fall back to their creation time.
+    resolved_at = (select(func.max(models.LifecycleEvent.at))
+                   .where(models.LifecycleEvent.entity_id == models.Report.id,
+                          models.LifecycleEvent.entity == "r",
+                          models.LifecycleEvent.to_status == "resolved")
+                   .correlate(models.Report)
+                   .scalar_subquery())
+    closed_at = func.coalesce(resolved_at, models.Report.created_at)
+    return (db.query(models.Report)
+            .filter(models.Report.status == "resolved")
+            .filter(closed_at < cutoff)
+            .filter(~has_task)
+            .order_by(closed_at)
+            .limit(batch_size)
+            .all())
+
+
+def archive_task_batch(db: Session, cutoff, batch_size=ARCHIVE_BATCH_SIZE, backend=ARCHIVE_BACKEND):
+    tasks = _closed_tasks(db, cutoff, batch_size)
+    if not tasks:
+        return 0
+
+    rows = [{f: getattr(t, f) for f in TASK_FIELDS} for t in tasks]
+    staged = []
+    if backend == "parquet":
+        staged = _write_parquet("tasks", rows)
+    else:
+        db.bulk_insert_mappings(models.ArchivedTask, rows)
+
+    for task in tasks:
+        db.delete(task)
+    _commit(db, staged)
+    return len(tasks)
+
+
+def archive_report_batch(db: Session, cutoff, batch_size=ARCHIVE_BATCH_SIZE, backend=ARCHIVE_BACKEND):
+    reports = _closed_reports(db, cutoff, batch_size)
+    if not reports:
+        return 0
+
+    report_ids = [r.id for r in reports]
+    # Unlink rejected tasks, same as deleting a report does
+    db.query(models.Task).filter(models.Task.report_id.in_(report_ids)) \
+        .update({models.Task.report_id: None}, synchronize_session=False)
+
+    moved = []
+    rows, image_rows = [], []
+    for report in reports:
+        row = {f: getattr(report, f) for f in REPORT_FIELDS}
+        images = [{"id": image.id, "report_id": report.id,
+                   "image_url": _move_image_to_cold(image.image_url, moved)}
+                  for image in report.images]
+        if backend == "parquet":
+            row["image_urls"] = [image["image_url"] for image in images]
+        rows.append(row)
+        image_rows.extend(images)
+
+    staged = []
+    if backend == "parquet":
+        staged = _write_parquet("reports", rows)
+    else:
+        db.bulk_insert_mappings(models.ArchivedReport, rows)
+        db.bulk_insert_mappings(models.ArchivedReportImage, image_rows)
+
+    for report in reports:
+        db.delete(report)
+    _commit(db, staged)
+    _remove_hot_files(moved)
+    return len(reports)
+
+
+def run_archive(db: Session, older_than_days=None, batch_size=None, backend=None):
+    """Archive every eligible task and report, one batch at a time."""
+    older_than_days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    backend = backend or ARCHIVE_BACKEND
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+
+    counts = {"tasks": 0, "reports": 0}
+    while True:
+        n = archive_task_batch(db, cutoff, batch_size, backend)
+        counts["tasks"] += n
+        if n < batch_size:
+            break
+    while True:
+        n = archive_report_batch(db, cutoff, batch_size, backend)
+        counts["reports"] += n
+        if n < batch_size:
+            break
+    return counts
+
+
+def read_parquet(kind, since=None, until=None, filters=None, limit=100, offset=0):
+    """Read archived rows back from the Parquet partitions of `kind`.
+
+    Whole date partitions outside [since, until] are skipped without being opened.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading the Parquet archive requires pyarrow to be installed")
+
+    root = os.path.join(ARCHIVE_DIR, kind)
+    if not os.path.isdir(root):
+        return []
+    # Archived timestamps are naive UTC
+    if since and since.tzinfo is not None:
+        since = since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    if until and until.tzinfo is not None:
+        until = until.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    results = []
+    skipped = 0
+    for folder in sorted(os.listdir(root), reverse=True):
+        if not folder.startswith("date="):
+            continue
+        day = datetime.date.fromisoformat(folder[len("date="):])
+        if since and day < since.date():
+            continue
+        if until and day > until.date():
+            continue
+        for part in sorted(os.listdir(os.path.join(root, folder))):
+            if not part.endswith(".parquet"):
+                continue   # staged by a batch that has not committed
+            for row in pq.read_table(os.path.join(root, folder, part)).to_pylist():
+                created_at = row.get("created_at")
+                if since and (created_at is None or created_at < since):
+                    continue
+                if until and (created_at is None or created_at > until):
+                    continue
+                if filters and any(row.get(k) != v for k, v in filters.items()):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                results.append(row)
+                if len(results) >= limit:
+                    return results
+    return results
@@ -0,0 +1,140 @@
+"""District lookup from coordinates, and district scoping for queries.
+
+District boundaries are read once from a GeoJSON FeatureCollection
+(DISTRICT_BOUNDARIES_PATH, e.g. the Karnataka district layer from the
+Survey of India / datameet). The district name is taken from the first of
+DISTRICT_NAME_KEYS found in each feature's properties. The polygons are put in
+a shapely STRtree: a batch of points is matched against polygon bounding boxes
+in one query, and the candidate pairs are then tested with one vectorized
+`intersects` call against the prepared polygons. Points just outside every
+polygon (coastline, simplified borders) fall back to the nearest district
+within NEAREST_MAX_DEGREES.
+
+Rows carry the district name in an indexed `district` column. A district
+authority with a district set only sees its own rows (`scoped`,
+`filter_district`); anyone else keeps the statewide view and may narrow it
+with a `district` parameter. Without a boundary file no row gets a district,
+so scoping is switched off and every authority gets the statewide view.
+Volunteers have no district; they are assigned across district lines.
+"""
+from shapely.geometry import shape
+from shapely.strtree import STRtree
+import shapely
+import numpy as np
+import threading
+import json
+import os
+
+DISTRICT_BOUNDARIES_PATH = os.getenv("DISTRICT_BOUNDARIES_PATH", "karnataka_districts.geojson")
+DISTRICT_NAME_KEYS = ("district", "DISTRICT", "dtname", "DIST_NAME", "NAME_2", "name")
+NEAREST_MAX_DEGREES = 0.05   # ~5 km
+
+
+class DistrictIndex:
+    def __init__(self, path=DISTRICT_BOUNDARIES_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.names = []
+        self.geoms = None
+        self.tree = None
+
+    def _load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            names, geoms = [], []
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    collection = json.load(f)
+                for feature in collection.get("features", []):
+                    props = feature.get("properties") or {}
+                    name = next((props[k] for k in DISTRICT_NAME_KEYS if props.get(k)), None)
+                    if not name or not feature.get("geometry"):
+                        continue
+                    geom = shape(feature["geometry"])
+                    shapely.prepare(geom)
+                    names.append(normalize(str(name)))
+                    geoms.append(geom)
+            else:
+                print(f"WARNING: district boundaries {self.path} not found. Rows will not get a district "
+                      f"and district scoping is disabled: every district authority sees statewide data. "
+                      f"Set DISTRICT_BOUNDARIES_PATH to enable it.")
+            self.names = names
+            self.geoms = np.array(geoms, dtype=object)
+            self.tree = STRtree(self.geoms) if geoms else None
+            self.loaded = True
+
+    def available(self):
+        """Whether any district boundaries are loaded."""
+        self._load()
+        return self.tree is not None
+
+    def known(self):
+        self._load()
+        return sorted(set(self.names))
+
+    def lookup_many(self, lats, lons):
+        """District name for each point, or None."""
+        self._load()
+        result = [None] * len(lats)
+        if self.tree is None or not len(lats):
+            return result
+        lats = np.asarray([np.nan if v is None else v for v in lats], dtype=float)
+        lons = np.asarray([np.nan if v is None else v for v in lons], dtype=float)
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        points = shapely.points(lons[valid], lats[valid])
+        point_idx, geom_idx = self.tree.query(points)
+        hits = shapely.intersects(self.geoms[geom_idx], points[point_idx])
+        for p, g in zip(point_idx[hits], geom_idx[hits]):
+            if result[valid[p]] is None:
+                result[valid[p]] = self.names[g]
+        missing = [i for i, p in enumerate(valid) if result[p] is None]
+        if missing:
+            point_idx, geom_idx = self.tree.query_nearest(points[missing], max_distance=NEAREST_MAX_DEGREES)
+            for p, g in zip(point_idx, geom_idx):
+                if result[valid[missing[p]]] is None:
+                    result[valid[missing[p]]] = self.names[g]
+        return result
+
+    def lookup(self, lat, lon):
+        return self.lookup_many([lat], [lon])[0]
+
+
+index = DistrictIndex()
+
+
+def normalize(name):
+    """Canonical district spelling ("  mysuru" -> "Mysuru"), or None."""
+    name = (name or "").strip()
+    return name.title() if name else None
+
+
+def district_for(lat, lon):
+    if lat is None or lon is None:
+        return None
+    return index.lookup(lat, lon)
+
+
+def user_district(current_user):
+    """The district a user is scoped to, or None for statewide access.
+
+    Anonymous callers, volunteers, and everyone when no boundaries are loaded
+    (rows then have no district to match) are statewide.
+    """
+    if current_user is None or current_user.role != "district":
+        return None
+    district = getattr(current_user, "district", None)
+    return district if district and index.available() else None
+
+
+def filter_district(current_user, requested=None):
+    """District to filter a listing on: a scoped user's own, else the requested one."""
+    return user_district(current_user) or normalize(requested)
+
+
+def scoped(query, model, current_user):
+    district = user_district(current_user)
+    if district:
+        query = query.filter(model.district == district)
+    return query
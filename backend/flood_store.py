@@ -0,0 +1,137 @@
+"""Flood-extent polygons with a spatial index for point-in-polygon checks.
+
+Polygons produced by Extract.py are stored per date in `flood_polygons`. For
+each date that is queried, the polygons are loaded once, prepared and put in
+a shapely STRtree. To classify a batch of points, the tree finds the polygons
+whose bounding box holds each point, and only those pairs are tested exactly
+with one vectorized `contains` call against the prepared polygons (the same
+scheme as districts.py).
+
+A loaded date is reused while its row count and latest `created_at` are
+unchanged, so polygons re-ingested by load_flood_polygons.py or another worker
+are picked up on the next request.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from shapely.geometry import shape, mapping, MultiPolygon, Polygon
+from shapely.strtree import STRtree
+import shapely
+import numpy as np
+import models
+import threading
+import datetime
+import json
+
+SIMPLIFY_DEGREES = 0.0005   # ~50 m; Extract.py already simplifies at 100 m
+
+
+class FloodExtent:
+    """The indexed polygons of one date."""
+
+    def __init__(self, rows):
+        self.polygon_ids = [r.polygon_id for r in rows]
+        self.areas = [r.area_sqkm for r in rows]
+        self.geoms = np.array([shape(json.loads(r.geometry)) for r in rows], dtype=object)
+        shapely.prepare(self.geoms)
+        self.tree = STRtree(self.geoms) if len(self.geoms) else None
+
+    def classify(self, lats, lons):
+        """Polygon id containing each point, or None."""
+        result = [None] * len(lats)
+        if self.tree is None or not len(lats):
+            return result
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        point_idx, geom_idx = self.tree.query(points)
+        hits = shapely.contains(self.geoms[geom_idx], points[point_idx])
+        for g, p in sorted(zip(geom_idx[hits], point_idx[hits])):
+            if result[p] is None:
+                result[p] = self.polygon_ids[g]
+        return result
+
+    def bounds(self):
+        """(south, west, north, east) covering every polygon."""
+        if not len(self.geoms):
+            return None
+        west, south, east, north = shapely.total_bounds(self.geoms)
+        return south, west, north, east
+
+    def feature_collection(self):
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "geometry": mapping(geom),
+                 "properties": {"polygon_id": pid, "area_sqkm": area}}
+                for pid, area, geom in zip(self.polygon_ids, self.areas, self.geoms)
+            ],
+        }
+
+    def hazard_feature(self):
+        """All polygons as one MultiPolygon feature, the shape GraphHopper `areas` expect."""
+        polygons = []
+        for geom in self.geoms:
+            polygons.extend(geom.geoms if isinstance(geom, MultiPolygon) else [geom])
+        return {"type": "Feature", "geometry": mapping(MultiPolygon(polygons)), "properties": {}}
+
+
+class FloodStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.extents = {}   # date -> (signature, FloodExtent)
+
+    def latest_date(self, db: Session):
+        return db.query(func.max(models.FloodPolygon.date)).scalar()
+
+    def extent(self, db: Session, day=None):
+        """Indexed polygons for `day` (default: latest ingested date), or None."""
+        day = day or self.latest_date(db)
+        if day is None:
+            return None
+        signature = tuple(db.query(func.count(models.FloodPolygon.id), func.max(models.FloodPolygon.created_at))
+                          .filter(models.FloodPolygon.date == day).one())
+        with self.lock:
+            cached = self.extents.get(day)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        rows = db.query(models.FloodPolygon).filter(models.FloodPolygon.date == day).all()
+        extent = FloodExtent(rows)
+        with self.lock:
+            self.extents[day] = (signature, extent)
+        return extent
+
+    def ingest(self, db: Session, feature_collection, default_day=None):
+        """Replace the polygons of each date found in a GeoJSON FeatureCollection.
+
+        Returns the number of polygons stored per date.
+        """
+        by_day = {}
+        for i, feature in enumerate(feature_collection.get("features", [])):
+            props = feature.get("properties") or {}
+            day = props.get("date") or default_day
+            if day is None or not feature.get("geometry"):
+                continue
+            if isinstance(day, str):
+                day = datetime.date.fromisoformat(day[:10])
+            geom = shape(feature["geometry"])
+            if not isinstance(geom, (Polygon, MultiPolygon)):
+                continue
+            geom = geom.simplify(SIMPLIFY_DEGREES, preserve_topology=True)
+            if geom.is_empty:
+                continue
+            by_day.setdefault(day, []).append(models.FloodPolygon(
+                polygon_id=str(props.get("polygon_id") or feature.get("id") or i),
+                date=day,
+                area_sqkm=props.get("area_sqkm"),
+                geometry=json.dumps(mapping(geom)),
+            ))
+
+        for day, polygons in by_day.items():
+            db.query(models.FloodPolygon).filter(models.FloodPolygon.date == day).delete()
+            db.add_all(polygons)
+        db.commit()
+        with self.lock:
+            for day in by_day:
+                self.extents.pop(day, None)
+        return {day.isoformat(): len(polygons) for day, polygons in by_day.items()}
+
+
+store = FloodStore()
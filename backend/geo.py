@@ -0,0 +1,88 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Karnataka bounding box (south, west, north, east)
+KARNATAKA_BBOX = (11.5, 74.0, 18.5, 78.6)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def km_to_lat_degrees(km):
+    return km / 111.32
+
+
+def km_to_lon_degrees(km, lat):
+    return km / (111.32 * max(math.cos(math.radians(lat)), 1e-6))
+
+
+class GridIndex:
+    """Points bucketed into a lat/lon grid for radius and nearest-neighbour queries."""
+
+    def __init__(self, cell_deg=0.05):
+        self.cell_deg = cell_deg
+        self.points = {}  # id -> (lat, lon)
+        self.cells = {}   # (i, j) -> set of ids
+
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)))
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, point_id):
+        return point_id in self.points
+
+    def add(self, point_id, lat, lon):
+        self.remove(point_id)
+        self.points[point_id] = (lat, lon)
+        self.cells.setdefault(self._cell(lat, lon), set()).add(point_id)
+
+    def remove(self, point_id):
+        pt = self.points.pop(point_id, None)
+        if pt is None:
+            return
+        key = self._cell(*pt)
+        cell = self.cells.get(key)
+        if cell is not None:
+            cell.discard(point_id)
+            if not cell:
+                del self.cells[key]
+
+    def within(self, lat, lon, km):
+        """[(distance_km, id)] of all points within `km`, unsorted."""
+        dlat, dlon = km_to_lat_degrees(km), km_to_lon_degrees(km, lat)
+        i0, j0 = self._cell(lat - dlat, lon - dlon)
+        i1, j1 = self._cell(lat + dlat, lon + dlon)
+        out = []
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            cells = [c for c in self.cells if i0 <= c[0] <= i1 and j0 <= c[1] <= j1]
+        else:
+            cells = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+        for cell in cells:
+            for point_id in self.cells.get(cell, ()):
+                plat, plon = self.points[point_id]
+                d = haversine_km(lat, lon, plat, plon)
+                if d <= km:
+                    out.append((d, point_id))
+        return out
+
+    def nearest(self, lat, lon, max_km=500.0):
+        """(distance_km, id) of the closest point within `max_km`, or None."""
+        if not self.points:
+            return None
+        km = self.cell_deg * 111.32
+        while True:
+            found = self.within(lat, lon, min(km, max_km))
+            if found:
+                return min(found)
+            if km >= max_km:
+                return None
+            km *= 2
@@ -0,0 +1,341 @@
+"""Local gazetteer and geocoding cache.
+
+Place names are resolved in this order:
+  1. in-memory cache, then the persistent `geocode_cache` table
+  2. the offline gazetteer (GAZETTEER_PATH): exact normalized name, then
+     prefix trie, then trigram fuzzy match
+  3. Nominatim, rate-limited to one request per NOMINATIM_INTERVAL seconds
+When a district is given, only places in that district are accepted from the
+gazetteer. Names nothing resolved are remembered in `geocode_misses` and not
+sent to Nominatim again for GEOCODE_MISS_TTL_DAYS.
+
+Names are normalized by lowercasing, stripping punctuation and dropping
+infrastructure words ("Bridge", "Dam", ...), the same way the flood-intel
+server cleaned its third search variant.
+
+The gazetteer file is either a CSV with name,district,latitude,longitude and an
+optional alternate_names column (';'-separated), or a GeoNames dump (IN.txt)
+from which Karnataka (admin1 code 19) entries are taken.
+"""
+from sqlalchemy.orm import Session
+import models
+import urllib.request
+import urllib.parse
+import threading
+import datetime
+import math
+import json
+import time
+import csv
+import re
+import os
+
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "gazetteer_karnataka.csv")
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+NOMINATIM_INTERVAL = float(os.getenv("NOMINATIM_INTERVAL", "1.0"))
+REMOTE_GEOCODING = os.getenv("REMOTE_GEOCODING", "1") != "0"
+USER_AGENT = "DisasterResponseHub/2.0"
+FUZZY_THRESHOLD = 0.55
+KARNATAKA_ADMIN1 = "19"
+MEMORY_CACHE_SIZE = 100000
+MISS_TTL = datetime.timedelta(days=float(os.getenv("GEOCODE_MISS_TTL_DAYS", "7")))
+
+DROP_WORDS = {"bridge", "dam", "barrage", "road", "highway", "circle", "village",
+              "taluk", "taluka", "town", "city", "district", "hobli"}
+
+
+def normalize(name):
+    words = re.sub(r"[^a-z0-9 ]+", " ", (name or "").lower()).split()
+    kept = [w for w in words if w not in DROP_WORDS]
+    return " ".join(kept or words)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class Gazetteer:
+    """Offline place names with a prefix trie and a trigram index."""
+
+    def __init__(self):
+        self.places = []     # [(name, district, lat, lon)]
+        self.districts = []  # normalized district per place, or None
+        self.exact = {}      # normalized name -> [place index]
+        self.root = TrieNode()
+        self.grams = {}      # trigram -> list of normalized names
+        self.name_grams = {} # normalized name -> trigram set
+
+    def __len__(self):
+        return len(self.places)
+
+    def add(self, name, district, lat, lon, alternate_names=()):
+        idx = len(self.places)
+        self.places.append((name, district, lat, lon))
+        self.districts.append(normalize(district) if district else None)
+        for variant in {normalize(n) for n in (name, *alternate_names) if n}:
+            if not variant:
+                continue
+            self.exact.setdefault(variant, []).append(idx)
+            node = self.root
+            for ch in variant:
+                node = node.children.setdefault(ch, TrieNode())
+            node.ids.append(idx)
+            if variant not in self.name_grams:
+                grams = frozenset(trigrams(variant))
+                self.name_grams[variant] = grams
+                for g in grams:
+                    self.grams.setdefault(g, []).append(variant)
+
+    def load(self, path):
+        if not os.path.exists(path):
+            print(f"Gazetteer file {path} not found; only cache and remote geocoding available")
+            return
+        with open(path, newline="", encoding="utf-8") as f:
+            first = f.readline()
+            f.seek(0)
+            if "\t" in first:
+                self._load_geonames(f)
+            else:
+                self._load_csv(f)
+
+    def _load_csv(self, f):
+        for row in csv.DictReader(f):
+            try:
+                alternates = [a for a in (row.get("alternate_names") or "").split(";") if a]
+                self.add(row["name"], row.get("district") or None,
+                         float(row["latitude"]), float(row["longitude"]), alternates)
+            except (KeyError, ValueError):
+                continue
+
+    def _load_geonames(self, f):
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 11 or cols[10] != KARNATAKA_ADMIN1 or cols[6] not in ("P", "A", "H", "T", "S"):
+                continue
+            alternates = [a for a in cols[3].split(",") if a.isascii()][:20]
+            self.add(cols[1], None, float(cols[4]), float(cols[5]), [cols[2], *alternates])
+
+    def _pick(self, indices, district_key):
+        """The place in the requested district. Without a district, or when the
+        candidates carry no district data (GeoNames), the first one. None when
+        the candidates are known to lie in other districts."""
+        if not indices:
+            return None
+        if district_key:
+            for i in indices:
+                if self.districts[i] == district_key:
+                    return self.places[i]
+            if any(self.districts[i] for i in indices):
+                return None
+        return self.places[indices[0]]
+
+    def prefix(self, text, limit=10):
+        node = self.root
+        for ch in normalize(text):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        out, stack = {}, [node]
+        while stack and len(out) < limit:
+            n = stack.pop()
+            for i in n.ids:
+                if len(out) < limit:
+                    out[i] = None
+            stack.extend(n.children.values())
+        return list(out)
+
+    def fuzzy(self, text, district=None):
+        """Best trigram (Dice) match above FUZZY_THRESHOLD in the district, as (place, score).
+
+        A name can only reach the threshold if it shares at least `min_shared`
+        grams, so it must appear in one of the `len(grams) - min_shared + 1`
+        rarest posting lists; only those are read, and candidates are then
+        filtered by length and scored with one set intersection each.
+        """
+        key = normalize(text)
+        grams = trigrams(key)
+        n = len(grams)
+        t = FUZZY_THRESHOLD
+        min_shared = max(1, math.ceil(t * n / (2 - t)))
+        postings = sorted((self.grams.get(g, ()) for g in grams), key=len)
+        candidates = set()
+        for posting in postings[:n - min_shared + 1]:
+            candidates.update(posting)
+
+        scored = []
+        for variant in candidates:
+            other = self.name_grams[variant]
+            m = len(other)
+            if 2 * min(n, m) / (n + m) < t:
+                continue
+            score = 2.0 * len(grams & other) / (n + m)
+            if score >= t:
+                scored.append((score, variant))
+        scored.sort(reverse=True)
+
+        district_key = normalize(district) if district else None
+        for score, variant in scored:
+            place = self._pick(self.exact[variant], district_key)
+            if place:
+                return place, score
+        return None, 0.0
+
+    def lookup(self, name, district=None):
+        """(place, source) for a name, or (None, None)."""
+        key = normalize(name)
+        district_key = normalize(district) if district else None
+        if key in self.exact:
+            place = self._pick(self.exact[key], district_key)
+            if place:
+                return place, "gazetteer"
+        # A unique prefix match handles truncated names ("Kattisang")
+        prefixed = self.prefix(key, limit=2)
+        if len(prefixed) == 1 and len(key) >= 5:
+            place = self._pick(prefixed, district_key)
+            if place:
+                return place, "gazetteer-prefix"
+        place, _ = self.fuzzy(key, district)
+        if place:
+            return place, "gazetteer-fuzzy"
+        return None, None
+
+
+class Geocoder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remote_lock = threading.Lock()
+        self.gazetteer = None
+        self.memory = {}     # cache key -> result dict, or the time a miss expires
+        self.last_remote = 0.0
+
+    def _ensure_gazetteer(self):
+        with self.lock:
+            if self.gazetteer is None:
+                gazetteer = Gazetteer()
+                gazetteer.load(GAZETTEER_PATH)
+                self.gazetteer = gazetteer
+        return self.gazetteer
+
+    @staticmethod
+    def cache_key(name, district):
+        return f"{normalize(name)}|{normalize(district) if district else ''}"
+
+    def _remote(self, name, district, state):
+        """Nominatim with the three query variants, one request per interval.
+
+        Returns (result, answered): `answered` is False when a request failed,
+        so an empty result is not a confirmed miss.
+        """
+        cleaned = normalize(name)
+        answered = True
+        queries = [
+            f"{name}, {district}, {state}, India" if district else f"{name}, {state}, India",
+            f"{name}, {state}, India",
+            f"{cleaned}, {district}, {state}, India" if district else f"{cleaned}, {state}, India",
+        ]
+        for query in dict.fromkeys(queries):
+            with self.remote_lock:
+                wait = self.last_remote + NOMINATIM_INTERVAL - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                self.last_remote = time.monotonic()
+                try:
+                    url = f"{NOMINATIM_URL}?{urllib.parse.urlencode({'format': 'json', 'q': query, 'limit': 1})}"
+                    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+                    with urllib.request.urlopen(req, timeout=10) as res:
+                        data = json.loads(res.read().decode("utf-8"))
+                except Exception as e:
+                    print(f"Geocoding error for {query}: {e}")
+                    answered = False
+                    continue
+            if data:
+                return {"latitude": float(data[0]["lat"]), "longitude": float(data[0]["lon"]),
+                        "display_name": data[0].get("display_name"), "source": "nominatim"}, True
+        return None, answered
+
+    def _remember(self, key, result):
+        if len(self.memory) >= MEMORY_CACHE_SIZE:
+            self.memory.clear()
+        self.memory[key] = result
+
+    def _recent_miss(self, db: Session, key):
+        """Whether `key` failed to resolve within MISS_TTL."""
+        cached = self.memory.get(key)
+        if isinstance(cached, datetime.datetime):
+            if cached > datetime.datetime.utcnow():
+                return True
+            del self.memory[key]
+        row = db.query(models.GeocodeMiss).filter(models.GeocodeMiss.key == key).first()
+        if row and row.checked_at + MISS_TTL > datetime.datetime.utcnow():
+            self._remember(key, row.checked_at + MISS_TTL)
+            return True
+        return False
+
+    def _local(self, db: Session, name, district, key):
+        if isinstance(self.memory.get(key), dict):
+            return self.memory[key]
+        row = db.query(models.GeocodeCache).filter(models.GeocodeCache.key == key).first()
+        if row:
+            result = {"latitude": row.latitude, "longitude": row.longitude,
+                      "display_name": row.display_name, "source": "cache"}
+            self._remember(key, result)
+            return result
+        place, source = self._ensure_gazetteer().lookup(name, district)
+        if place:
+            result = {"latitude": place[2], "longitude": place[3],
+                      "display_name": ", ".join(p for p in (place[0], place[1]) if p), "source": source}
+            self._remember(key, result)
+            return result
+        return None
+
+    def resolve_many(self, db: Session, items, state="Karnataka", remote=True):
+        """Resolve [(name, district)] pairs. Local lookups first, remote only for misses."""
+        results = [None] * len(items)
+        misses = {}
+        for i, (name, district) in enumerate(items):
+            key = self.cache_key(name, district)
+            results[i] = self._local(db, name, district, key)
+            if results[i] is None:
+                misses.setdefault(key, []).append(i)
+
+        if remote and REMOTE_GEOCODING:
+            for key, indices in misses.items():
+                if self._recent_miss(db, key):
+                    continue
+                name, district = items[indices[0]]
+                result, answered = self._remote(name, district, state)
+                if result is None and answered:
+                    now = datetime.datetime.utcnow()
+                    db.merge(models.GeocodeMiss(key=key, name=name, district=district, checked_at=now))
+                    db.commit()
+                    self._remember(key, now + MISS_TTL)
+                if result is None:
+                    continue
+                db.merge(models.GeocodeCache(key=key, name=name, district=district,
+                                             latitude=result["latitude"], longitude=result["longitude"],
+                                             display_name=result["display_name"]))
+                db.commit()
+                self._remember(key, result)
+                for i in indices:
+                    results[i] = result
+        return results
+
+    def resolve(self, db: Session, name, district=None, state="Karnataka", remote=True):
+        return self.resolve_many(db, [(name, district)], state, remote)[0]
+
+    def suggest(self, prefix, limit=10):
+        gazetteer = self._ensure_gazetteer()
+        return [{"name": p[0], "district": p[1], "latitude": p[2], "longitude": p[3]}
+                for p in (gazetteer.places[i] for i in gazetteer.prefix(prefix, limit))]
+
+
+geocoder = Geocoder()
@@ -0,0 +1,316 @@
+"""Precomputed density grids for the map heatmap layers.
+
+Each layer keeps one NumPy grid per UTC day over the Karnataka bbox at the
+finest resolution, built with a vectorized `histogram2d` on load and then
+updated one cell at a time when reports or tasks change. Windows are rolling
+(the last 24 hours, 7 or 30 days, to the hour): a (window, zoom) request sums
+the day grids fully inside the window, adds the items of the day it starts in
+one by one, and downsamples by block-summing. Results, including encoded
+PNG/binary tiles, are cached per hour until the layer changes again.
+
+Layers:
+  reports - unresolved reports, weighted by severity (0-100 scaled to 0-1)
+  tasks   - open tasks, weighted by priority
+  floods  - flood centroids from Extract.py, weighted by area in sq km
+"""
+from sqlalchemy.orm import Session
+import numpy as np
+import models
+import geo
+import triage
+import threading
+import datetime
+import struct
+import zlib
+import time
+import csv
+import os
+
+BASE_RES = 256                  # cells per side at the finest zoom level
+ZOOM_LEVELS = 4                 # zoom 0 = 32x32 ... zoom 3 = 256x256
+MAX_WINDOW_DAYS = 31            # day grids kept; covers the first day of a 30d window
+WINDOWS = {"24h": 24, "7d": 24 * 7, "30d": 24 * 30, "all": None}   # rolling, in hours
+RELOAD_INTERVAL = float(os.getenv("HEATMAP_RELOAD_INTERVAL", "300"))
+FLOOD_CENTROIDS_CSV = os.getenv(
+    "FLOOD_CENTROIDS_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Karnataka_Flood_Centroids.csv"),
+)
+
+SOUTH, WEST, NORTH, EAST = geo.KARNATAKA_BBOX
+
+OPEN_TASK_STATUSES = ("assigned", "accepted", "completed")
+PRIORITY_WEIGHTS = {"low": 1.0, "medium": 2.0, "high": 3.0}
+
+
+def _today():
+    return datetime.datetime.utcnow().date().toordinal()
+
+
+def _hour():
+    return int(time.time() // 3600)
+
+
+def _when(dt):
+    """(UTC day ordinal, epoch seconds) of a naive UTC datetime (None = now)."""
+    dt = dt or datetime.datetime.utcnow()
+    return dt.date().toordinal(), dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _cell(lat, lon):
+    """Finest-grid (row, col) of a point, or None outside the bbox."""
+    if lat is None or lon is None or not (SOUTH <= lat <= NORTH and WEST <= lon <= EAST):
+        return None
+    row = min(int((lat - SOUTH) / (NORTH - SOUTH) * BASE_RES), BASE_RES - 1)
+    col = min(int((lon - WEST) / (EAST - WEST) * BASE_RES), BASE_RES - 1)
+    return row, col
+
+
+class DensityLayer:
+    def __init__(self):
+        self.days = {}     # day ordinal -> float32 grid, last MAX_WINDOW_DAYS days
+        self.day_ids = {}  # day ordinal -> ids in that day's grid
+        self.older = np.zeros((BASE_RES, BASE_RES), dtype=np.float32)
+        self.items = {}    # id -> (row, col, day, ts, weight)
+        self.version = 0
+
+    def _grid_for(self, day):
+        if day <= _today() - MAX_WINDOW_DAYS:
+            return self.older
+        grid = self.days.get(day)
+        if grid is None:
+            grid = self.days[day] = np.zeros((BASE_RES, BASE_RES), dtype=np.float32)
+            self.day_ids[day] = set()
+        return grid
+
+    def build(self, items):
+        """Rebuild from (id, lat, lon, weight, when) tuples with one histogram2d per day."""
+        self.days, self.day_ids, self.items = {}, {}, {}
+        self.older = np.zeros((BASE_RES, BASE_RES), dtype=np.float32)
+        items = [i for i in items if i[1] is not None and i[2] is not None]
+        if items:
+            ids = [i[0] for i in items]
+            lats = np.array([i[1] for i in items], dtype=np.float64)
+            lons = np.array([i[2] for i in items], dtype=np.float64)
+            weights = np.array([i[3] for i in items], dtype=np.float64)
+            whens = [_when(i[4]) for i in items]
+            days = np.array([w[0] for w in whens])
+
+            inside = (lats >= SOUTH) & (lats <= NORTH) & (lons >= WEST) & (lons <= EAST)
+            # Same arithmetic as _cell(), so later discards hit the same cells
+            rows = np.minimum(((lats - SOUTH) / (NORTH - SOUTH) * BASE_RES).astype(int), BASE_RES - 1)
+            cols = np.minimum(((lons - WEST) / (EAST - WEST) * BASE_RES).astype(int), BASE_RES - 1)
+
+            for day in np.unique(days[inside]):
+                mask = inside & (days == day)
+                hist, _, _ = np.histogram2d(rows[mask], cols[mask], bins=BASE_RES,
+                                            range=[[0, BASE_RES], [0, BASE_RES]], weights=weights[mask])
+                self._grid_for(int(day))[:] += hist.astype(np.float32)
+            for k in np.flatnonzero(inside):
+                day = int(days[k])
+                self.items[ids[k]] = (int(rows[k]), int(cols[k]), day, whens[k][1], float(weights[k]))
+                if day in self.day_ids:
+                    self.day_ids[day].add(ids[k])
+        self.version += 1
+
+    def add(self, item_id, lat, lon, weight, when):
+        self.discard(item_id)
+        cell = _cell(lat, lon)
+        if cell is None:
+            return
+        day, ts = _when(when)
+        self.items[item_id] = (cell[0], cell[1], day, ts, weight)
+        self._grid_for(day)[cell] += weight
+        if day in self.day_ids:
+            self.day_ids[day].add(item_id)
+        self.version += 1
+
+    def discard(self, item_id):
+        # Fold expired days first so the item is looked up where it lives now
+        self.expire()
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        row, col, day, _, weight = item
+        grid = self._grid_for(day)
+        grid[row, col] = max(0.0, grid[row, col] - weight)
+        if day in self.day_ids:
+            self.day_ids[day].discard(item_id)
+        self.version += 1
+
+    def expire(self):
+        """Fold day grids that left the longest window into `older`."""
+        cutoff = _today() - MAX_WINDOW_DAYS
+        for day in [d for d in self.days if d <= cutoff]:
+            self.older += self.days.pop(day)
+            del self.day_ids[day]
+
+    def grid(self, window_hours):
+        """Sum over the current hour and the `window_hours - 1` before it (None = everything).
+
+        Whole days inside the window come from the day grids; the day the window
+        starts in is added item by item.
+        """
+        self.expire()
+        if window_hours is None:
+            out = self.older.copy()
+            for grid in self.days.values():
+                out += grid
+            return out
+        start_ts = (_hour() - window_hours + 1) * 3600
+        start_day = datetime.datetime.utcfromtimestamp(start_ts).date().toordinal()
+        out = np.zeros((BASE_RES, BASE_RES), dtype=np.float32)
+        for day, grid in self.days.items():
+            if day > start_day:
+                out += grid
+        for item_id in self.day_ids.get(start_day, ()):
+            row, col, _, ts, weight = self.items[item_id]
+            if ts >= start_ts:
+                out[row, col] += weight
+        return out
+
+
+def downsample(grid, zoom):
+    """Block-sum the finest grid down to 32 * 2**zoom cells per side."""
+    factor = 2 ** (ZOOM_LEVELS - 1 - zoom)
+    if factor == 1:
+        return grid
+    n = grid.shape[0] // factor
+    return grid.reshape(n, factor, n, factor).sum(axis=(1, 3))
+
+
+def encode_png(grid):
+    """8-bit grayscale PNG of a grid, north up, scaled to its own maximum."""
+    top = float(grid.max())
+    scaled = np.zeros(grid.shape, dtype=np.uint8) if top <= 0 else (np.sqrt(grid / top) * 255).astype(np.uint8)
+    rows = np.flipud(scaled)
+    height, width = rows.shape
+    raw = b"".join(b"\x00" + rows[r].tobytes() for r in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+class HeatmapService:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.layers = {"reports": DensityLayer(), "tasks": DensityLayer(), "floods": DensityLayer()}
+        self.cache = {}
+        self.loaded_at = 0.0
+        self.floods_mtime = None
+
+    # --- loading ---
+
+    def load(self, db: Session):
+        reports = (db.query(models.Report.id, models.Report.latitude, models.Report.longitude,
+                            models.Report.severity, models.Report.created_at)
+                   .filter(models.Report.status != "resolved").all())
+        tasks = (db.query(models.Task.id, models.Task.latitude, models.Task.longitude,
+                          models.Task.priority, models.Task.created_at)
+                 .filter(models.Task.status.in_(OPEN_TASK_STATUSES)).all())
+        with self.lock:
+            self.layers["reports"].build(
+                (r.id, r.latitude, r.longitude, triage.severity_value(r.severity) / 100.0, r.created_at)
+                for r in reports)
+            self.layers["tasks"].build(
+                (t.id, t.latitude, t.longitude, PRIORITY_WEIGHTS.get(t.priority, 2.0), t.created_at)
+                for t in tasks)
+            self._load_floods()
+            self.cache = {}
+            self.loaded_at = time.monotonic()
+
+    def _load_floods(self):
+        try:
+            mtime = os.path.getmtime(FLOOD_CENTROIDS_CSV)
+        except OSError:
+            return
+        if mtime == self.floods_mtime:
+            return
+        items = []
+        with open(FLOOD_CENTROIDS_CSV, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    when = datetime.datetime.strptime(row["date"], "%Y-%m-%d")
+                    items.append((row["polygon_id"], float(row["latitude"]), float(row["longitude"]),
+                                  float(row["area_sqkm"]), when))
+                except (KeyError, ValueError):
+                    continue
+        self.layers["floods"].build(items)
+        self.floods_mtime = mtime
+
+    def ensure_loaded(self, db: Session):
+        if time.monotonic() - self.loaded_at > RELOAD_INTERVAL:
+            self.load(db)
+
+    # --- incremental updates ---
+
+    def report_changed(self, report):
+        with self.lock:
+            layer = self.layers["reports"]
+            if report.status == "resolved":
+                layer.discard(report.id)
+            else:
+                weight = triage.severity_value(report.severity) / 100.0
+                layer.add(report.id, report.latitude, report.longitude, weight, report.created_at)
+
+    def add_report_rows(self, rows):
+        with self.lock:
+            for row in rows:
+                weight = triage.severity_value(row["severity"]) / 100.0
+                self.layers["reports"].add(row["id"], row["latitude"], row["longitude"], weight, row["created_at"])
+
+    def report_removed(self, report_id):
+        with self.lock:
+            self.layers["reports"].discard(report_id)
+
+    def task_changed(self, task):
+        with self.lock:
+            layer = self.layers["tasks"]
+            if task.status in OPEN_TASK_STATUSES:
+                weight = PRIORITY_WEIGHTS.get(task.priority, 2.0)
+                layer.add(task.id, task.latitude, task.longitude, weight, task.created_at)
+            else:
+                layer.discard(task.id)
+
+    def task_removed(self, task_id):
+        with self.lock:
+            self.layers["tasks"].discard(task_id)
+
+    # --- queries ---
+
+    def grid(self, layer, window, zoom):
+        key = (layer, window, zoom, "grid", _hour())
+        with self.lock:
+            if layer == "floods":
+                self._load_floods()
+            version = self.layers[layer].version
+            cached = self.cache.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+            grid = downsample(self.layers[layer].grid(WINDOWS[window]), zoom)
+            self._store(key, version, grid)
+            return grid
+
+    def encoded(self, layer, window, zoom, fmt):
+        """PNG or raw little-endian float32 bytes of a grid, cached per layer version."""
+        key = (layer, window, zoom, fmt, _hour())
+        with self.lock:
+            grid = self.grid(layer, window, zoom)
+            version = self.layers[layer].version
+            cached = self.cache.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+            data = encode_png(grid) if fmt == "png" else np.flipud(grid).astype("<f4").tobytes()
+            self._store(key, version, data)
+            return data
+
+    def _store(self, key, version, value):
+        if len(self.cache) > 512:
+            self.cache = {}
+        self.cache[key] = (version, value)
+
+
+service = HeatmapService()
@@ -0,0 +1,266 @@
+"""Write-behind ingestion queue for report surges.
+
+When REPORT_INGEST_MODE=queue, POST /api/reports/ validates a report, appends it
+to a durable SQLite spool and answers 202 straight away. A background writer
+drains the spool into the main database with batched multi-row inserts.
+
+A report is only removed from the spool after the transaction that stores it has
+committed, so anything that was acknowledged survives a restart. Inserts skip ids
+that already exist, which makes replaying a batch after a crash harmless.
+
+Several uvicorn workers may share one INGEST_SPOOL_PATH: each runs a writer on
+the same spool, and the backlog for INGEST_MAX_PENDING is always counted from
+the spool table itself rather than per process.
+"""
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, DataError
+from database import SessionLocal
+import models
+import triage
+import heatmap
+import districts
+import datetime
+import threading
+import sqlite3
+import json
+import os
+
+INGEST_MODE = os.getenv("REPORT_INGEST_MODE", "direct")  # 'direct' or 'queue'
+SPOOL_PATH = os.getenv("INGEST_SPOOL_PATH", "ingest_spool.db")
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "50000"))
+FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.5"))
+MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "10"))
+MAX_BACKOFF = 30.0
+
+# Errors caused by the row itself rather than by the database being unavailable
+BAD_ROW_ERRORS = (IntegrityError, DataError, KeyError, ValueError)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ReportSpool:
+    """Append-only SQLite spool of accepted-but-not-yet-stored reports."""
+
+    def __init__(self, path=SPOOL_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT UNIQUE NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                error TEXT
+            )
+        """)
+
+    def _pending(self):
+        # Counted from the table: other processes append to and drain the same spool
+        return self.conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    @property
+    def pending(self):
+        with self.lock:
+            return self._pending()
+
+    def full(self):
+        return self.pending >= MAX_PENDING
+
+    def append(self, report_id, payload):
+        """Durably enqueue a report. Returns False if the id is already queued."""
+        with self.lock:
+            if self._pending() >= MAX_PENDING:
+                raise QueueFull()
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO spool (id, payload) VALUES (?, ?)",
+                (report_id, json.dumps(payload)),
+            )
+            return bool(cur.rowcount)
+
+    def peek(self, limit):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, id, payload, attempts FROM spool ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [(seq, rid, json.loads(payload), attempts) for seq, rid, payload, attempts in rows]
+
+    def remove(self, seqs):
+        if not seqs:
+            return
+        with self.lock:
+            self.conn.executemany("DELETE FROM spool WHERE seq = ?", [(s,) for s in seqs])
+
+    def mark_failed(self, seqs):
+        with self.lock:
+            self.conn.executemany("UPDATE spool SET attempts = attempts + 1 WHERE seq = ?", [(s,) for s in seqs])
+
+    def dead_letter(self, seq, report_id, payload, error):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute("INSERT OR REPLACE INTO dead_letter (id, payload, error) VALUES (?, ?, ?)",
+                              (report_id, json.dumps(payload), error))
+            self.conn.execute("DELETE FROM spool WHERE seq = ?", (seq,))
+            self.conn.execute("COMMIT")
+
+    def state(self, report_id):
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM spool WHERE id = ?", (report_id,)).fetchone():
+                return "queued"
+            if self.conn.execute("SELECT 1 FROM dead_letter WHERE id = ?", (report_id,)).fetchone():
+                return "failed"
+        return None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def _report_row(report_id, payload):
+    return {
+        "id": report_id,
+        "title": payload["title"],
+        "description": payload["description"],
+        "severity": payload["severity"],
+        "latitude": payload["latitude"],
+        "longitude": payload["longitude"],
+        "user_id": payload["user_id"],
+        "status": "new",
+        "created_at": datetime.datetime.fromisoformat(payload["created_at"]),
+    }
+
+
+def write_batch(entries):
+    """Store one batch of spooled reports in a single transaction.
+
+    Returns the report rows that were newly inserted.
+    """
+    db = SessionLocal()
+    try:
+        ids = [rid for _, rid, _, _ in entries]
+        existing = {r.id for r in db.query(models.Report.id).filter(models.Report.id.in_(ids))}
+        fresh = [(rid, payload) for _, rid, payload, _ in entries if rid not in existing]
+        rows = [_report_row(rid, p) for rid, p in fresh]
+        if rows:
+            # A report is never dropped over its author: an unknown (e.g. deleted)
+            # user_id is stored as anonymous instead of failing the foreign key.
+            user_ids = {r["user_id"] for r in rows if r["user_id"]}
+            known = {u.id for u in db.query(models.User.id).filter(models.User.id.in_(user_ids))} if user_ids else set()
+            for row in rows:
+                if row["user_id"] not in known:
+                    row["user_id"] = None
+            names = districts.index.lookup_many([r["latitude"] for r in rows], [r["longitude"] for r in rows])
+            for row, name in zip(rows, names):
+                row["district"] = name
+            db.execute(insert(models.Report), rows)
+            image_rows = [{"id": models.generate_uuid(), "report_id": rid, "image_url": url}
+                          for rid, p in fresh for url in p.get("image_urls", [])]
+            if image_rows:
+                db.execute(insert(models.ReportImage), image_rows)
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _notify_stored(rows):
+    """Feed newly stored reports to the in-memory indexes."""
+    if rows:
+        triage.engine.add_rows(rows)
+        heatmap.service.add_report_rows(rows)
+
+
+class IngestWriter:
+    """Background thread draining the spool into the database."""
+
+    def __init__(self, spool):
+        self.spool = spool
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.backoff = 0.0
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="report-ingest-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            drained = self.drain_once()
+            if self.stop_event.is_set() and (drained == 0 or self.backoff):
+                break
+            if drained < BATCH_SIZE:
+                self.stop_event.wait(self.backoff or FLUSH_INTERVAL)
+
+    def drain_once(self):
+        entries = self.spool.peek(BATCH_SIZE)
+        if not entries:
+            return 0
+        try:
+            rows = write_batch(entries)
+        except Exception as e:
+            print(f"Error writing report batch of {len(entries)}: {e}")
+            self._retry(entries, e)
+            return 0
+        self.spool.remove([seq for seq, _, _, _ in entries])
+        self.backoff = 0.0
+        _notify_stored(rows)
+        return len(entries)
+
+    def _retry(self, entries, error):
+        self.backoff = min(MAX_BACKOFF, (self.backoff * 2) or FLUSH_INTERVAL)
+        self.spool.mark_failed([seq for seq, _, _, _ in entries])
+        if not isinstance(error, BAD_ROW_ERRORS):
+            # Database unavailable or similar: keep everything and retry later
+            return
+        # Retry one-by-one so a single bad row cannot block the whole batch
+        for entry in entries:
+            seq, rid, payload, attempts = entry
+            try:
+                rows = write_batch([entry])
+                self.spool.remove([seq])
+                _notify_stored(rows)
+            except BAD_ROW_ERRORS as e:
+                if attempts + 1 >= MAX_ATTEMPTS:
+                    self.spool.dead_letter(seq, rid, payload, str(e))
+            except Exception:
+                return
+
+
+spool = None
+writer = None
+
+
+def start():
+    global spool, writer
+    if INGEST_MODE != "queue" or writer is not None:
+        return
+    spool = ReportSpool()
+    writer = IngestWriter(spool)
+    writer.start()
+
+
+def stop():
+    global spool, writer
+    if writer is None:
+        return
+    writer.stop()
+    spool.close()
+    spool, writer = None, None
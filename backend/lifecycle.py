@@ -0,0 +1,364 @@
+"""Task and report lifecycle log with streaming response-time analytics.
+
+Every status transition is appended to `lifecycle_events` in the same
+transaction as the status change (log_task / log_report). Each row carries the
+time spent in the stage that just ended:
+  accept   - task assigned -> accepted
+  complete - task accepted -> completed
+  verify   - task completed -> verified
+  resolve  - report created -> resolved
+Accept/reject decisions are counted to give rejection rates.
+
+LifecycleAnalytics tails the log by time and folds new rows into t-digests
+kept per stage overall, per zone, per district and per volunteer, and per
+(district, zone) and (district, volunteer) so a district authority's
+breakdowns only cover its own district. Ids and `at`
+are assigned before commit, so a row can become visible after rows with higher
+ids; each refresh re-reads the last COMMIT_MARGIN seconds and skips the ids it
+has already folded. Each digest is split into hourly buckets so a window of
+the last N hours is the merge of N small digests.
+Only recent rows are read on each refresh, so dashboards stay fast however
+long the log grows, and every process sees the same numbers.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import numpy as np
+import models
+import threading
+import datetime
+import math
+import time
+import os
+
+COMPRESSION = 100
+BUFFER_SIZE = 500
+BUCKET_SECONDS = 3600
+RETENTION_HOURS = int(os.getenv("LIFECYCLE_RETENTION_HOURS", str(24 * 7)))
+REFRESH_INTERVAL = float(os.getenv("LIFECYCLE_REFRESH_INTERVAL", "5"))
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+NO_ZONE = "none"
+COMMIT_MARGIN = datetime.timedelta(seconds=float(os.getenv("LIFECYCLE_COMMIT_MARGIN", "120")))
+
+# to_status -> stage whose duration ends at that transition
+TASK_STAGES = {"accepted": "accept", "completed": "complete", "verified": "verify"}
+REPORT_STAGES = {"resolved": "resolve"}
+DECISIONS = ("accepted", "rejected")
+
+
+def _timestamp(dt):
+    return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class TDigest:
+    """Merging t-digest: approximate quantiles from a bounded set of centroids."""
+
+    def __init__(self, compression=COMPRESSION):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.buffer = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum()) + len(self.buffer)
+
+    def add(self, value):
+        self.buffer.append(value)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= BUFFER_SIZE:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        if not len(other.means):
+            return
+        self._compress(other.means, other.weights)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q_limit(self, q):
+        """Highest quantile the centroid starting at `q` may reach (k1 scale function)."""
+        k = self._k(q) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self, extra_means=None, extra_weights=None):
+        means = [self.means]
+        weights = [self.weights]
+        if self.buffer:
+            means.append(np.asarray(self.buffer, dtype=float))
+            weights.append(np.ones(len(self.buffer)))
+            self.buffer = []
+        if extra_means is not None:
+            means.append(extra_means)
+            weights.append(extra_weights)
+        if len(means) == 1:
+            return
+        means = np.concatenate(means)
+        weights = np.concatenate(weights)
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        out_means, out_weights = [], []
+        cur_mean, cur_weight = means[0], weights[0]
+        done = 0.0
+        limit = self._q_limit(0.0)
+        for mean, weight in zip(means[1:], weights[1:]):
+            if (done + cur_weight + weight) / total <= limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                out_means.append(cur_mean)
+                out_weights.append(cur_weight)
+                done += cur_weight
+                limit = self._q_limit(done / total)
+                cur_mean, cur_weight = mean, weight
+        out_means.append(cur_mean)
+        out_weights.append(cur_weight)
+        self.means = np.asarray(out_means)
+        self.weights = np.asarray(out_weights)
+
+    def quantile(self, q):
+        self._compress()
+        if not len(self.means):
+            return None
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[0.0], centers, [total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * total, xs, ys))
+
+    def mean(self):
+        self._compress()
+        total = self.weights.sum()
+        return float((self.means * self.weights).sum() / total) if total else None
+
+
+class RollingDigest:
+    """Hourly t-digests; a window query merges the buckets it covers."""
+
+    def __init__(self):
+        self.buckets = {}   # hour -> TDigest
+
+    def add(self, ts, value):
+        hour = int(ts // BUCKET_SECONDS)
+        digest = self.buckets.get(hour)
+        if digest is None:
+            digest = self.buckets[hour] = TDigest()
+        digest.add(value)
+
+    def window(self, hours, now):
+        first = int(now // BUCKET_SECONDS) - hours + 1
+        merged = TDigest()
+        for hour, digest in self.buckets.items():
+            if hour >= first:
+                merged.merge(digest)
+        return merged
+
+    def prune(self, oldest_hour):
+        for hour in [h for h in self.buckets if h < oldest_hour]:
+            del self.buckets[hour]
+        return bool(self.buckets)
+
+
+class RollingCounter:
+    def __init__(self):
+        self.buckets = {}   # hour -> {outcome: count}
+
+    def add(self, ts, outcome):
+        counts = self.buckets.setdefault(int(ts // BUCKET_SECONDS), {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def window(self, hours, now):
+        first = int(now // BUCKET_SECONDS) - hours + 1
+        totals = {}
+        for hour, counts in self.buckets.items():
+            if hour >= first:
+                for outcome, n in counts.items():
+                    totals[outcome] = totals.get(outcome, 0) + n
+        return totals
+
+    def prune(self, oldest_hour):
+        for hour in [h for h in self.buckets if h < oldest_hour]:
+            del self.buckets[hour]
+        return bool(self.buckets)
+
+
+def _summary(digest):
+    stats = {"count": int(digest.count), "mean": digest.mean()}
+    for name, q in QUANTILES.items():
+        stats[name] = digest.quantile(q)
+    return stats
+
+
+class LifecycleAnalytics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.digests = {}    # (dimension, key, stage) -> RollingDigest
+        self.decisions = {}  # (dimension, key) -> RollingCounter
+        self.last_at = None
+        self.folded = {}     # id -> at, for rows inside the commit margin
+        self.refreshed_at = 0.0
+        self.pruned_hour = 0
+
+    def _keys(self, event):
+        keys = [("all", ""), ("zone", event.zone or NO_ZONE)]
+        if event.district:
+            keys.append(("district", event.district))
+            keys.append(("district_zone", (event.district, event.zone or NO_ZONE)))
+        if event.volunteer_id:
+            keys.append(("volunteer", event.volunteer_id))
+            if event.district:
+                keys.append(("district_volunteer", (event.district, event.volunteer_id)))
+        return keys
+
+    def _fold(self, event):
+        ts = _timestamp(event.at)
+        stages = TASK_STAGES if event.entity == "t" else REPORT_STAGES
+        stage = stages.get(event.to_status)
+        for dimension, key in self._keys(event):
+            if stage and event.elapsed_seconds is not None:
+                digest = self.digests.get((dimension, key, stage))
+                if digest is None:
+                    digest = self.digests[(dimension, key, stage)] = RollingDigest()
+                digest.add(ts, event.elapsed_seconds)
+            if event.entity == "t" and event.from_status == "assigned" and event.to_status in DECISIONS:
+                counter = self.decisions.get((dimension, key))
+                if counter is None:
+                    counter = self.decisions[(dimension, key)] = RollingCounter()
+                counter.add(ts, event.to_status)
+
+    def _prune(self, now):
+        oldest = int(now // BUCKET_SECONDS) - RETENTION_HOURS + 1
+        if oldest <= self.pruned_hour:
+            return
+        self.digests = {k: d for k, d in self.digests.items() if d.prune(oldest)}
+        self.decisions = {k: c for k, c in self.decisions.items() if c.prune(oldest)}
+        self.pruned_hour = oldest
+
+    def refresh(self, db: Session):
+        """Fold in log rows committed since the last refresh (the retention window on first use)."""
+        with self.refresh_lock:
+            if self.last_at is None:
+                cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=RETENTION_HOURS)
+            else:
+                cutoff = self.last_at - COMMIT_MARGIN
+            query = (db.query(models.LifecycleEvent)
+                     .filter(models.LifecycleEvent.at >= cutoff)
+                     .order_by(models.LifecycleEvent.at, models.LifecycleEvent.id))
+            for event in query.yield_per(5000):
+                if event.id in self.folded:
+                    continue
+                with self.lock:
+                    self._fold(event)
+                self.folded[event.id] = event.at
+                if self.last_at is None or event.at > self.last_at:
+                    self.last_at = event.at
+            if self.last_at is not None:
+                horizon = self.last_at - COMMIT_MARGIN
+                self.folded = {i: at for i, at in self.folded.items() if at >= horizon}
+            with self.lock:
+                self._prune(time.time())
+            self.refreshed_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if time.monotonic() - self.refreshed_at > REFRESH_INTERVAL:
+            self.refresh(db)
+
+    def stats(self, dimension, key, hours):
+        """Stage percentiles (seconds) and rejection rate for one key over the last `hours`."""
+        now = time.time()
+        with self.lock:
+            stages = {stage: _summary(d.window(hours, now))
+                      for (dim, k, stage), d in self.digests.items() if dim == dimension and k == key}
+            counter = self.decisions.get((dimension, key))
+            counts = counter.window(hours, now) if counter else {}
+        decided = sum(counts.get(d, 0) for d in DECISIONS)
+        return {
+            "stages": {stage: s for stage, s in stages.items() if s["count"]},
+            "decisions": decided,
+            "rejection_rate": counts.get("rejected", 0) / decided if decided else None,
+        }
+
+    def keys(self, dimension):
+        with self.lock:
+            keys = {k for (dim, k, _) in self.digests if dim == dimension}
+            keys.update(k for (dim, k) in self.decisions if dim == dimension)
+        return sorted(keys)
+
+
+analytics = LifecycleAnalytics()
+
+
+# --- logging transitions ---
+
+def _task_elapsed(db: Session, task, previous, status, now):
+    if status in ("accepted", "rejected"):
+        start = task.created_at
+    elif status == "completed":
+        start = (db.query(func.max(models.LifecycleEvent.at))
+                 .filter(models.LifecycleEvent.entity_id == task.id,
+                         models.LifecycleEvent.to_status == "accepted")
+                 .scalar()) or task.created_at
+    elif status == "verified" and previous == "completed":
+        start = task.completed_at
+    else:
+        return None
+    return max(0.0, (now - start).total_seconds()) if start else None
+
+
+def log_task(db: Session, task, previous, actor_id=None, status=None):
+    """Append a task transition to the session; committed with the status change.
+
+    `status` overrides the new status, e.g. "deleted".
+    """
+    status = status or task.status
+    if previous == status:
+        return None
+    now = datetime.datetime.utcnow()
+    event = models.LifecycleEvent(
+        at=now,
+        entity="t",
+        entity_id=task.id,
+        from_status=previous,
+        to_status=status,
+        elapsed_seconds=_task_elapsed(db, task, previous, status, now),
+        zone=task.zone,
+        district=task.district,
+        volunteer_id=task.volunteer_id,
+        actor_id=actor_id,
+    )
+    db.add(event)
+    return event
+
+
+def log_report(db: Session, report, previous, actor_id=None, status=None):
+    status = status or report.status
+    if previous == status:
+        return None
+    now = datetime.datetime.utcnow()
+    elapsed = None
+    if status == "resolved" and report.created_at:
+        elapsed = max(0.0, (now - report.created_at).total_seconds())
+    event = models.LifecycleEvent(
+        at=now,
+        entity="r",
+        entity_id=report.id,
+        from_status=previous,
+        to_status=status,
+        elapsed_seconds=elapsed,
+        zone=report.zone,
+        district=report.district,
+        actor_id=actor_id,
+    )
+    db.add(event)
+    return event
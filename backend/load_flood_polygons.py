@@ -0,0 +1,26 @@
+from database import SessionLocal
+import flood_store
+import json
+import sys
+
+def load(path):
+    with open(path) as f:
+        feature_collection = json.load(f)
+    db = SessionLocal()
+    try:
+        stored = flood_store.store.ingest(db, feature_collection)
+        for day, count in stored.items():
+            print(f"Stored {count} flood polygons for {day}.")
+        if not stored:
+            print("No dated polygon features found.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python load_flood_polygons.py <Karnataka_Flood_Polygons.geojson>")
+    else:
+        load(sys.argv[1])
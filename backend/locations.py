@@ -0,0 +1,204 @@
+"""Live volunteer positions from high-frequency GPS pings.
+
+Every volunteer gets a slot in preallocated NumPy arrays: a ring buffer of the
+last RING_SIZE pings as (timestamp, lat, lon) rows, plus their latest fix. The
+latest fix is also kept in a lat/lon grid, which answers "who is within 5 km
+right now" from memory. A batch of pings is written with one vectorized
+assignment into the ring.
+
+A background flusher persists the trail every TRAIL_FLUSH_INTERVAL seconds.
+It keeps at most one point per TRAIL_SECONDS per volunteer and writes all of
+them in one multi-row INSERT.
+"""
+from sqlalchemy import insert
+from database import SessionLocal
+import numpy as np
+import models
+import geo
+import threading
+import datetime
+import time
+import os
+
+RING_SIZE = int(os.getenv("LOCATION_RING_SIZE", "256"))
+TRAIL_SECONDS = float(os.getenv("TRAIL_SECONDS", "60"))
+TRAIL_FLUSH_INTERVAL = float(os.getenv("TRAIL_FLUSH_INTERVAL", "30"))
+LIVE_MAX_AGE = float(os.getenv("LIVE_MAX_AGE", "600"))   # seconds a fix counts as "now"
+
+
+class PositionStore:
+    def __init__(self, ring_size=RING_SIZE, capacity=1024):
+        self.lock = threading.Lock()
+        self.ring_size = ring_size
+        self.slots = {}                                       # volunteer_id -> slot
+        self.ids = []                                         # slot -> volunteer_id
+        self.ring = np.zeros((capacity, ring_size, 3))        # (ts, lat, lon)
+        self.written = np.zeros(capacity, dtype=np.int64)     # pings ever written per slot
+        self.flushed = np.zeros(capacity, dtype=np.int64)     # `written` at the last flush
+        self.last_trail_ts = np.zeros(capacity)               # ts of the last persisted point
+        self.latest = np.zeros((capacity, 3))                 # newest (ts, lat, lon) per slot
+        self.grid = geo.GridIndex()
+
+    def _slot(self, volunteer_id):
+        slot = self.slots.get(volunteer_id)
+        if slot is not None:
+            return slot
+        slot = len(self.ids)
+        if slot == len(self.written):
+            self._grow()
+        self.slots[volunteer_id] = slot
+        self.ids.append(volunteer_id)
+        return slot
+
+    def _grow(self):
+        extra = len(self.written)
+        self.ring = np.concatenate([self.ring, np.zeros_like(self.ring[:extra])])
+        self.written = np.concatenate([self.written, np.zeros(extra, dtype=np.int64)])
+        self.flushed = np.concatenate([self.flushed, np.zeros(extra, dtype=np.int64)])
+        self.last_trail_ts = np.concatenate([self.last_trail_ts, np.zeros(extra)])
+        self.latest = np.concatenate([self.latest, np.zeros((extra, 3))])
+
+    def ingest(self, volunteer_id, pings):
+        """Record (ts, lat, lon) pings for one volunteer. Returns how many were kept."""
+        if not len(pings):
+            return 0
+        points = np.asarray(pings, dtype=float)
+        points = points[np.argsort(points[:, 0], kind="stable")][-self.ring_size:]
+        with self.lock:
+            slot = self._slot(volunteer_id)
+            n = len(points)
+            idx = (self.written[slot] + np.arange(n)) % self.ring_size
+            self.ring[slot, idx] = points
+            self.written[slot] += n
+            if points[-1, 0] >= self.latest[slot, 0]:
+                self.latest[slot] = points[-1]
+                self.grid.add(volunteer_id, points[-1, 1], points[-1, 2])
+        return n
+
+    def _ordered(self, slot, count):
+        """The newest `count` ring rows of a slot, oldest first."""
+        count = int(min(count, self.written[slot], self.ring_size))
+        if count <= 0:
+            return np.zeros((0, 3))
+        end = self.written[slot]
+        idx = (np.arange(end - count, end)) % self.ring_size
+        return self.ring[slot, idx]
+
+    def recent(self, volunteer_id, since=0.0):
+        with self.lock:
+            slot = self.slots.get(volunteer_id)
+            if slot is None:
+                return np.zeros((0, 3))
+            points = self._ordered(slot, self.ring_size)
+        return points[points[:, 0] >= since]
+
+    def position(self, volunteer_id):
+        with self.lock:
+            slot = self.slots.get(volunteer_id)
+            return None if slot is None else tuple(self.latest[slot])
+
+    def nearby(self, lat, lon, km, max_age=LIVE_MAX_AGE):
+        """[(distance_km, volunteer_id, ts, lat, lon)] with a fix newer than `max_age`, nearest first."""
+        cutoff = time.time() - max_age
+        with self.lock:
+            out = []
+            for d, volunteer_id in self.grid.within(lat, lon, km):
+                ts, plat, plon = self.latest[self.slots[volunteer_id]]
+                if ts >= cutoff:
+                    out.append((d, volunteer_id, ts, plat, plon))
+        return sorted(out)
+
+    def live_positions(self, max_age=LIVE_MAX_AGE):
+        """{volunteer_id: (lat, lon)} for every fix newer than `max_age`."""
+        cutoff = time.time() - max_age
+        with self.lock:
+            fresh = np.flatnonzero(self.latest[:len(self.ids), 0] >= cutoff)
+            return {self.ids[s]: (self.latest[s, 1], self.latest[s, 2]) for s in fresh}
+
+    def take_trail_points(self):
+        """Downsampled pings written since the last call, as trail rows."""
+        rows = []
+        with self.lock:
+            pending = np.flatnonzero(self.written[:len(self.ids)] > self.flushed[:len(self.ids)])
+            for slot in pending:
+                points = self._ordered(slot, self.written[slot] - self.flushed[slot])
+                last = self.last_trail_ts[slot]
+                for ts, lat, lon in points:
+                    if ts - last >= TRAIL_SECONDS:
+                        rows.append({
+                            "volunteer_id": self.ids[slot],
+                            "recorded_at": datetime.datetime.utcfromtimestamp(ts),
+                            "latitude": float(lat),
+                            "longitude": float(lon),
+                        })
+                        last = ts
+                self.last_trail_ts[slot] = last
+                self.flushed[slot] = self.written[slot]
+        return rows
+
+
+def write_trail_points(rows):
+    db = SessionLocal()
+    try:
+        db.execute(insert(models.VolunteerTrailPoint), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class TrailFlusher:
+    MAX_CARRY = 500000
+
+    def __init__(self, store):
+        self.store = store
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.carry = []     # rows from a failed write, retried on the next flush
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="trail-flusher", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self.stop_event.wait(TRAIL_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        rows = self.carry + self.store.take_trail_points()
+        self.carry = []
+        if not rows:
+            return 0
+        try:
+            write_trail_points(rows)
+        except Exception as e:
+            print(f"Error writing {len(rows)} trail points: {e}")
+            self.carry = rows[-self.MAX_CARRY:]
+            return 0
+        return len(rows)
+
+
+positions = PositionStore()
+flusher = None
+
+
+def start():
+    global flusher
+    if flusher is None:
+        flusher = TrailFlusher(positions)
+        flusher.start()
+
+
+def stop():
+    global flusher
+    if flusher is not None:
+        flusher.stop()
+        flusher = None
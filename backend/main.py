@@ -3,7 +3,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from database import engine
 import models
-from routers import auth, reports, tasks, resources, stats
+from routers import auth, reports, tasks, resources, stats, history, triage, heatmap, geocode, export, floods, locations, sla
+from admission import AdmissionControl
+import archive
+import ingest
+import locations as volunteer_locations
 import os
 
 # Create tables
@@ -11,6 +15,9 @@ models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
 
+# Rate limits and load shedding; added before CORS so rejections still get CORS headers
+app.add_middleware(AdmissionControl, secret_key=auth.SECRET_KEY, algorithm=auth.ALGORITHM)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -25,11 +32,36 @@ if not os.path.exists("uploads"):
     os.makedirs("uploads")
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+# Mount cold storage for archived report images
+if not os.path.exists(archive.COLD_UPLOAD_DIR):
+    os.makedirs(archive.COLD_UPLOAD_DIR)
+app.mount(archive.COLD_UPLOAD_URL, StaticFiles(directory=archive.COLD_UPLOAD_DIR), name="archive-uploads")
+
 app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(resources.router, prefix="/api/resources", tags=["Resources"])
 app.include_router(stats.router, prefix="/api/stats", tags=["Stats"])
+app.include_router(history.router, prefix="/api/history", tags=["History"])
+app.include_router(triage.router, prefix="/api/triage", tags=["Triage"])
+app.include_router(heatmap.router, prefix="/api/heatmap", tags=["Heatmap"])
+app.include_router(geocode.router, prefix="/api/geocode", tags=["Geocoding"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(floods.router, prefix="/api/floods", tags=["Floods"])
+app.include_router(locations.router, prefix="/api/locations", tags=["Locations"])
+app.include_router(sla.router, prefix="/api/sla", tags=["SLA"])
+
+
+@app.on_event("startup")
+def start_background_workers():
+    ingest.start()
+    volunteer_locations.start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    ingest.stop()
+    volunteer_locations.stop()
 
 
 @app.get("/")
@@ -0,0 +1,19 @@
+from database import engine
+from sqlalchemy import text
+
+# create_all() does not add indexes to tables that already exist; the archiver
+# and the hot-table list queries filter on these columns.
+INDEXES = {
+    "ix_reports_status": "reports (status)",
+    "ix_reports_created_at": "reports (created_at)",
+    "ix_tasks_status": "tasks (status)",
+}
+
+def migrate():
+    with engine.begin() as conn:
+        for name, target in INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target};"))
+            print(f"Created index {name} on {target}.")
+
+if __name__ == "__main__":
+    migrate()
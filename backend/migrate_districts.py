@@ -0,0 +1,97 @@
+from database import engine, SessionLocal
+from sqlalchemy import text
+import models
+import districts
+import re
+import sys
+
+# Adds the district column and its indexes, then fills it in from coordinates.
+#
+#   python migrate_districts.py                   columns, indexes and backfill
+#   python migrate_districts.py --partial-indexes also one partial index per district
+#
+# Native LIST partitioning would need the district in every primary and
+# foreign key (report_images, tasks -> reports), so per-district partial
+# indexes are used instead: each district's queries only touch an index the
+# size of its own incident count.
+
+BATCH_SIZE = 2000
+
+COLUMNS = ["users", "reports", "tasks", "rescue_centers", "archived_reports", "archived_tasks",
+           "lifecycle_events"]
+INDEXES = {
+    "ix_users_district": "users (district)",
+    "ix_reports_district_status": "reports (district, status)",
+    "ix_tasks_district_status": "tasks (district, status)",
+    "ix_rescue_centers_district": "rescue_centers (district)",
+    "ix_archived_reports_district": "archived_reports (district)",
+    "ix_archived_tasks_district": "archived_tasks (district)",
+}
+
+
+def migrate():
+    with engine.begin() as conn:
+        for table in COLUMNS:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS district VARCHAR;"))
+        for name, target in INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target};"))
+        print("Added district columns and indexes.")
+
+
+def _backfill(db, model):
+    """Assign districts from coordinates, walking the table by id."""
+    updated, last_id = 0, ""
+    while True:
+        rows = (db.query(model.id, model.latitude, model.longitude)
+                .filter(model.district == None, model.id > last_id)
+                .order_by(model.id).limit(BATCH_SIZE).all())
+        if not rows:
+            return updated
+        names = districts.index.lookup_many([r.latitude for r in rows], [r.longitude for r in rows])
+        mappings = [{"id": r.id, "district": name} for r, name in zip(rows, names) if name]
+        if mappings:
+            db.bulk_update_mappings(model, mappings)
+            db.commit()
+        updated += len(mappings)
+        last_id = rows[-1].id
+
+
+def backfill():
+    if not districts.index.known():
+        print("No district boundaries loaded; set DISTRICT_BOUNDARIES_PATH.")
+        return
+    db = SessionLocal()
+    try:
+        print(f"Reports: {_backfill(db, models.Report)} assigned.")
+        result = db.execute(text("""
+            UPDATE tasks SET district = (SELECT reports.district FROM reports WHERE reports.id = tasks.report_id)
+            WHERE district IS NULL AND report_id IS NOT NULL;
+        """))
+        db.commit()
+        print(f"Tasks: {result.rowcount} assigned from their report, "
+              f"{_backfill(db, models.Task)} from coordinates.")
+        print(f"Rescue centers: {_backfill(db, models.RescueCenter)} assigned.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+
+def create_partial_indexes():
+    with engine.begin() as conn:
+        for name in districts.index.known():
+            slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+            value = name.replace("'", "''")
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_reports_{slug} ON reports (status, created_at) "
+                              f"WHERE district = '{value}';"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_tasks_{slug} ON tasks (status, volunteer_id) "
+                              f"WHERE district = '{value}';"))
+            print(f"Created partial indexes for {name}.")
+
+
+if __name__ == "__main__":
+    migrate()
+    backfill()
+    if "--partial-indexes" in sys.argv:
+        create_partial_indexes()
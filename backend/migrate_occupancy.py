@@ -0,0 +1,13 @@
+from database import engine
+from sqlalchemy import text
+
+def migrate():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            ALTER TABLE rescue_centers
+            ADD COLUMN IF NOT EXISTS occupancy INTEGER NOT NULL DEFAULT 0;
+        """))
+        print("Added occupancy column to rescue_centers.")
+
+if __name__ == "__main__":
+    migrate()
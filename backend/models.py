@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -17,6 +17,7 @@ class User(Base):
     address = Column(String, nullable=True)
     password_hash = Column(String, nullable=False)
     role = Column(String, nullable=False) # 'volunteer' or 'district'
+    district = Column(String, nullable=True, index=True) # district authorities without one see statewide data
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     reports = relationship("Report", back_populates="owner")
@@ -24,6 +25,7 @@ class User(Base):
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (Index("ix_reports_district_status", "district", "status"),)
 
     id = Column(String, primary_key=True, default=generate_uuid)
     title = Column(String, nullable=False)
@@ -31,9 +33,10 @@ class Report(Base):
     severity = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    status = Column(String, default="new") # new, in-progress, resolved
+    status = Column(String, default="new", index=True) # new, in-progress, resolved
     zone = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    district = Column(String, nullable=True) # derived from coordinates (districts.py)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     user_id = Column(String, ForeignKey("users.id"))
 
     owner = relationship("User", back_populates="reports")
@@ -55,22 +58,26 @@ class RescueCenter(Base):
     name = Column(String, nullable=False)
     address = Column(String, nullable=False)
     capacity = Column(Integer, nullable=True)
+    occupancy = Column(Integer, default=0, nullable=False)
     contact = Column(String, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    district = Column(String, nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (Index("ix_tasks_district_status", "district", "status"),)
 
     id = Column(String, primary_key=True, default=generate_uuid)
     title = Column(String, nullable=False)
     description = Column(String, nullable=False)
-    status = Column(String, default="assigned") # assigned, accepted, rejected, completed, verified
+    status = Column(String, default="assigned", index=True) # assigned, accepted, rejected, completed, verified
     priority = Column(String, default="medium") # low, medium, high
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     zone = Column(String, nullable=True)
+    district = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     
@@ -79,3 +86,112 @@ class Task(Base):
 
     volunteer = relationship("User", back_populates="tasks")
     report = relationship("Report")
+
+# --- Archive (cold) tables ---
+# Resolved reports and verified tasks are moved here by archive.py so the hot
+# tables above only hold active incidents.
+
+class ArchivedReport(Base):
+    __tablename__ = "archived_reports"
+
+    id = Column(String, primary_key=True)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    status = Column(String, nullable=False)
+    zone = Column(String, nullable=True)
+    district = Column(String, index=True, nullable=True)
+    created_at = Column(DateTime, index=True)
+    user_id = Column(String, index=True, nullable=True)
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    images = relationship("ArchivedReportImage", back_populates="report", cascade="all, delete-orphan")
+
+class ArchivedReportImage(Base):
+    __tablename__ = "archived_report_images"
+
+    id = Column(String, primary_key=True)
+    report_id = Column(String, ForeignKey("archived_reports.id"), index=True)
+    image_url = Column(String, nullable=False)
+
+    report = relationship("ArchivedReport", back_populates="images")
+
+class ArchivedTask(Base):
+    __tablename__ = "archived_tasks"
+
+    id = Column(String, primary_key=True)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    priority = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    zone = Column(String, nullable=True)
+    district = Column(String, index=True, nullable=True)
+    created_at = Column(DateTime, index=True)
+    completed_at = Column(DateTime, nullable=True)
+    volunteer_id = Column(String, index=True, nullable=True)
+    report_id = Column(String, index=True, nullable=True)
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class GeocodeCache(Base):
+    __tablename__ = "geocode_cache"
+
+    key = Column(String, primary_key=True) # normalized "name|district"
+    name = Column(String, nullable=False)
+    district = Column(String, nullable=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    display_name = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Names that neither the gazetteer nor Nominatim could resolve, so they are not
+# sent to Nominatim again until GEOCODE_MISS_TTL_DAYS have passed.
+class GeocodeMiss(Base):
+    __tablename__ = "geocode_misses"
+
+    key = Column(String, primary_key=True) # normalized "name|district"
+    name = Column(String, nullable=False)
+    district = Column(String, nullable=True)
+    checked_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class FloodPolygon(Base):
+    __tablename__ = "flood_polygons"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    polygon_id = Column(String, nullable=False)
+    date = Column(Date, nullable=False, index=True)
+    area_sqkm = Column(Float, nullable=True)
+    geometry = Column(String, nullable=False) # simplified GeoJSON geometry
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class VolunteerTrailPoint(Base):
+    __tablename__ = "volunteer_trail_points"
+    __table_args__ = (Index("ix_trail_volunteer_time", "volunteer_id", "recorded_at"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    volunteer_id = Column(String, ForeignKey("users.id"), nullable=False)
+    recorded_at = Column(DateTime, nullable=False, index=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+
+# Append-only log of task and report status transitions. Rows are never
+# updated. `elapsed_seconds` is the time spent in the stage that just ended,
+# so lifecycle analytics can be rebuilt from this table alone.
+class LifecycleEvent(Base):
+    __tablename__ = "lifecycle_events"
+    __table_args__ = (Index("ix_lifecycle_entity_time", "entity_id", "at"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False, index=True)
+    entity = Column(String(1), nullable=False) # "t" task, "r" report
+    entity_id = Column(String, nullable=False)
+    from_status = Column(String(16), nullable=True)
+    to_status = Column(String(16), nullable=False)
+    elapsed_seconds = Column(Float, nullable=True)
+    zone = Column(String, nullable=True)
+    district = Column(String, nullable=True)
+    volunteer_id = Column(String, nullable=True)
+    actor_id = Column(String, nullable=True)
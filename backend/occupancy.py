@@ -0,0 +1,192 @@
+"""Rescue-center occupancy: atomic bed reservations and a free-capacity index.
+
+The database row is the source of truth. Reservations are single conditional
+UPDATEs (`occupancy + n <= capacity`), so concurrent requests can never
+overbook a center. The in-memory index is refreshed from the values those
+updates return and is only used to pick candidate centers quickly.
+"""
+from sqlalchemy import update, or_
+from sqlalchemy.orm import Session
+from bisect import insort, bisect_left
+import models
+import geo
+import threading
+import math
+import time
+import os
+
+CELL_DEG = 0.25
+INDEX_TTL = float(os.getenv("CAPACITY_INDEX_TTL", "60"))
+
+
+def _cell(lat, lon):
+    return (int(math.floor(lat / CELL_DEG)), int(math.floor(lon / CELL_DEG)))
+
+
+def _ring(ci, cj, r):
+    """Grid cells at Chebyshev distance exactly r from (ci, cj)."""
+    if r == 0:
+        return [(ci, cj)]
+    cells = [(ci - r, j) for j in range(cj - r, cj + r + 1)]
+    cells += [(ci + r, j) for j in range(cj - r, cj + r + 1)]
+    cells += [(i, cj - r) for i in range(ci - r + 1, ci + r)]
+    cells += [(i, cj + r) for i in range(ci - r + 1, ci + r)]
+    return cells
+
+
+class CapacityIndex:
+    """Centers with capacity, bucketed in a lat/lon grid and ordered by free beds."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.centers = {}   # id -> dict(name, lat, lon, capacity, occupancy)
+        self.cells = {}     # (i, j) -> set of ids
+        self.by_free = []   # sorted [(-free_beds, id)]
+        self.loaded_at = 0.0
+
+    def _free(self, c):
+        return max(0, c["capacity"] - c["occupancy"])
+
+    def load(self, db: Session):
+        centers = db.query(models.RescueCenter).filter(models.RescueCenter.capacity != None).all()
+        with self.lock:
+            self.centers, self.cells, self.by_free = {}, {}, []
+            for c in centers:
+                self._add(c.id, c.name, c.latitude, c.longitude, c.capacity, c.occupancy or 0)
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if time.monotonic() - self.loaded_at > INDEX_TTL:
+            self.load(db)
+
+    def _add(self, center_id, name, lat, lon, capacity, occupancy):
+        c = {"name": name, "lat": lat, "lon": lon, "capacity": capacity, "occupancy": occupancy}
+        self.centers[center_id] = c
+        insort(self.by_free, (-self._free(c), center_id))
+        if lat is not None and lon is not None:
+            self.cells.setdefault(_cell(lat, lon), set()).add(center_id)
+
+    def _drop(self, center_id):
+        c = self.centers.pop(center_id, None)
+        if c is None:
+            return
+        key = (-self._free(c), center_id)
+        i = bisect_left(self.by_free, key)
+        if i < len(self.by_free) and self.by_free[i] == key:
+            self.by_free.pop(i)
+        if c["lat"] is not None and c["lon"] is not None:
+            cell = self.cells.get(_cell(c["lat"], c["lon"]))
+            if cell:
+                cell.discard(center_id)
+                if not cell:
+                    del self.cells[_cell(c["lat"], c["lon"])]
+
+    def upsert(self, center: models.RescueCenter):
+        with self.lock:
+            self._drop(center.id)
+            if center.capacity is not None:
+                self._add(center.id, center.name, center.latitude, center.longitude,
+                          center.capacity, center.occupancy or 0)
+
+    def remove(self, center_id):
+        with self.lock:
+            self._drop(center_id)
+
+    def set_occupancy(self, center_id, occupancy):
+        with self.lock:
+            c = self.centers.get(center_id)
+            if c is None:
+                return
+            self._drop(center_id)
+            self._add(center_id, c["name"], c["lat"], c["lon"], c["capacity"], occupancy)
+
+    def _entry(self, center_id, distance_km=None):
+        c = self.centers[center_id]
+        return {"id": center_id, "free_beds": self._free(c), "distance_km": distance_km}
+
+    def most_free(self, min_beds=1, limit=10):
+        with self.lock:
+            out = []
+            for neg_free, center_id in self.by_free:
+                if -neg_free < min_beds or len(out) >= limit:
+                    break
+                out.append(self._entry(center_id))
+            return out
+
+    def nearest(self, lat, lon, min_beds=1, limit=10, max_km=None):
+        """Nearest centers with at least `min_beds` free, by expanding grid rings."""
+        with self.lock:
+            if not self.cells:
+                return []
+            ci, cj = _cell(lat, lon)
+            max_ring = max(max(abs(i - ci), abs(j - cj)) for i, j in self.cells)
+            found = []
+            seen_cells = set()
+
+            def scan(cells):
+                for cell in cells:
+                    for center_id in self.cells.get(cell, ()):
+                        c = self.centers[center_id]
+                        if self._free(c) < min_beds:
+                            continue
+                        d = geo.haversine_km(lat, lon, c["lat"], c["lon"])
+                        if max_km is None or d <= max_km:
+                            found.append((d, center_id))
+                    seen_cells.add(cell)
+
+            for r in range(max_ring + 1):
+                # Anything in ring r is at least this far away
+                lon_km = 111.32 * math.cos(math.radians(min(89.0, abs(lat) + r * CELL_DEG)))
+                ring_min_km = max(0, r - 1) * CELL_DEG * lon_km
+                if len(found) >= limit and ring_min_km > found[limit - 1][0]:
+                    break
+                if max_km is not None and ring_min_km > max_km:
+                    break
+                if 8 * r > len(self.cells):
+                    # Rings are now bigger than the occupied grid; finish with a direct scan
+                    scan([cell for cell in self.cells if cell not in seen_cells])
+                    found.sort()
+                    break
+                scan(_ring(ci, cj, r))
+                found.sort()
+            return [self._entry(center_id, round(d, 3)) for d, center_id in found[:limit]]
+
+
+index = CapacityIndex()
+
+
+def reserve_beds(db: Session, center_id, beds):
+    """Atomically add `beds` to a center's occupancy.
+
+    Returns the new occupancy, or None if the center is missing or too full.
+    """
+    center = models.RescueCenter
+    stmt = (update(center)
+            .where(center.id == center_id)
+            .where(or_(center.capacity == None, center.occupancy + beds <= center.capacity))
+            .values(occupancy=center.occupancy + beds)
+            .returning(center.occupancy)
+            .execution_options(synchronize_session=False))
+    row = db.execute(stmt).first()
+    db.commit()
+    if row is None:
+        return None
+    index.set_occupancy(center_id, row[0])
+    return row[0]
+
+
+def release_beds(db: Session, center_id, beds):
+    """Atomically free `beds` at a center. Returns None if fewer are occupied."""
+    center = models.RescueCenter
+    stmt = (update(center)
+            .where(center.id == center_id)
+            .where(center.occupancy >= beds)
+            .values(occupancy=center.occupancy - beds)
+            .returning(center.occupancy)
+            .execution_options(synchronize_session=False))
+    row = db.execute(stmt).first()
+    db.commit()
+    if row is None:
+        return None
+    index.set_occupancy(center_id, row[0])
+    return row[0]
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import districts
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -59,6 +60,15 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
     if db_user:
         raise HTTPException(status_code=400, detail="Email or Phone already registered")
     
+    district = districts.normalize(user.district)
+    known = districts.index.known()
+    if district and not known:
+        # Nothing could be matched against it; see districts.py
+        print(f"Ignoring district {district!r} for {user.email}: no district boundaries are loaded")
+        district = None
+    if district and district not in known:
+        raise HTTPException(status_code=400, detail="Unknown district")
+
     hashed_password = get_password_hash(user.password)
     new_user = models.User(
         name=user.name,
@@ -66,7 +76,8 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
         phone=user.phone,
         address=user.address,
         password_hash=hashed_password,
-        role=user.role
+        role=user.role,
+        district=district
     )
     db.add(new_user)
     db.commit()
@@ -98,4 +109,5 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
 
 @router.get("/volunteers", response_model=List[schemas.UserResponse])
 def get_all_volunteers(db: Session = Depends(get_db)):
+    # Not district-scoped: volunteers have no district and are assigned across district lines
     return db.query(models.User).filter(models.User.role == "volunteer").all()
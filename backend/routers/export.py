@@ -0,0 +1,206 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import selectinload
+from database import SessionLocal
+import models
+import districts
+from routers.tasks import get_current_user, get_optional_user
+from datetime import datetime, date
+from typing import Optional
+import json
+import zlib
+
+# Streaming exports for partner GIS tools.
+#
+# Rows are read through a server-side cursor (yield_per) and written out one
+# chunk at a time, so memory stays flat however many rows match. Rows are
+# ordered by id; a dump that was cut off can be resumed with `after=<last id>`
+# (every feature / line carries its id), which seeks on the primary key
+# instead of re-reading what was already sent.
+#
+# Reports and rescue centers are public, but reporter ids are only included
+# for district authorities. Tasks follow GET /api/tasks/: a signed-in
+# authority gets its district's tasks, a volunteer only their own.
+router = APIRouter()
+
+CHUNK_SIZE = 1000
+
+REPORT_FIELDS = ["title", "description", "severity", "status", "zone", "district", "created_at", "user_id"]
+PUBLIC_REPORT_FIELDS = [f for f in REPORT_FIELDS if f != "user_id"]
+TASK_FIELDS = ["title", "description", "status", "priority", "zone", "district", "created_at", "completed_at",
+               "volunteer_id", "report_id"]
+CENTER_FIELDS = ["name", "address", "capacity", "occupancy", "contact", "district", "created_at"]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _parse_bbox(bbox):
+    """'south,west,north,east' -> tuple of floats."""
+    if not bbox:
+        return None
+    try:
+        south, west, north, east = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'south,west,north,east'")
+    return south, west, north, east
+
+
+def _filtered(query, model, bbox, since, until, status, after, district=None):
+    if district:
+        query = query.filter(model.district == district)
+    if bbox:
+        south, west, north, east = bbox
+        query = query.filter(model.latitude >= south, model.latitude <= north,
+                             model.longitude >= west, model.longitude <= east)
+    if since:
+        query = query.filter(model.created_at >= since)
+    if until:
+        query = query.filter(model.created_at <= until)
+    if status:
+        query = query.filter(model.status.in_(status.split(",")))
+    if after:
+        query = query.filter(model.id > after)
+    return query.order_by(model.id)
+
+
+def _rows(build_query, to_properties):
+    """Yield (id, lat, lon, properties) from a server-side cursor, with its own session.
+
+    The request's session would be closed before the response body is streamed.
+    """
+    db = SessionLocal()
+    try:
+        for row in build_query(db).yield_per(CHUNK_SIZE):
+            yield row.id, row.latitude, row.longitude, to_properties(row)
+    finally:
+        db.close()
+
+
+def _geojson(rows):
+    yield '{"type":"FeatureCollection","features":['
+    first = True
+    buffer = []
+    for row_id, lat, lon, properties in rows:
+        geometry = None if lat is None or lon is None else {"type": "Point", "coordinates": [lon, lat]}
+        feature = {"type": "Feature", "id": row_id, "geometry": geometry, "properties": properties}
+        buffer.append(("" if first else ",") + json.dumps(feature, default=_json_default))
+        first = False
+        if len(buffer) >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+    yield "]}\n"
+
+
+def _ndjson(rows):
+    buffer = []
+    for row_id, lat, lon, properties in rows:
+        buffer.append(json.dumps({"id": row_id, "latitude": lat, "longitude": lon, **properties},
+                                 default=_json_default) + "\n")
+        if len(buffer) >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _stream(name, rows, format, gzip):
+    if format not in ("geojson", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be geojson or ndjson")
+    body = _geojson(rows) if format == "geojson" else _ndjson(rows)
+    media_type = "application/geo+json" if format == "geojson" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = _gzipped(body)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@router.get("/reports")
+def export_reports(
+    request: Request,
+    format: str = "geojson",
+    bbox: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    district: Optional[str] = None,
+    gzip: bool = False,
+    current_user: Optional[models.User] = Depends(get_optional_user),
+):
+    box = _parse_bbox(bbox)
+    district = districts.filter_district(current_user, district)
+    base_url = str(request.base_url).rstrip("/")
+    fields = REPORT_FIELDS if current_user and current_user.role == "district" else PUBLIC_REPORT_FIELDS
+
+    def build_query(db):
+        query = db.query(models.Report).options(selectinload(models.Report.images))
+        return _filtered(query, models.Report, box, since, until, status, after, district)
+
+    def to_properties(report):
+        properties = {f: getattr(report, f) for f in fields}
+        properties["images"] = [base_url + image.image_url for image in report.images]
+        return properties
+
+    return _stream("reports", _rows(build_query, to_properties), format, gzip)
+
+
+@router.get("/tasks")
+def export_tasks(
+    format: str = "geojson",
+    bbox: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    district: Optional[str] = None,
+    gzip: bool = False,
+    current_user: models.User = Depends(get_current_user),
+):
+    box = _parse_bbox(bbox)
+    district = districts.filter_district(current_user, district)
+
+    def build_query(db):
+        query = db.query(models.Task)
+        if current_user.role != "district":
+            query = query.filter(models.Task.volunteer_id == current_user.id)
+        return _filtered(query, models.Task, box, since, until, status, after, district)
+
+    return _stream("tasks", _rows(build_query, lambda t: {f: getattr(t, f) for f in TASK_FIELDS}), format, gzip)
+
+
+@router.get("/rescue-centers")
+def export_rescue_centers(
+    format: str = "geojson",
+    bbox: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    district: Optional[str] = None,
+    gzip: bool = False,
+    current_user: Optional[models.User] = Depends(get_optional_user),
+):
+    box = _parse_bbox(bbox)
+    district = districts.filter_district(current_user, district)
+
+    def build_query(db):
+        return _filtered(db.query(models.RescueCenter), models.RescueCenter, box, since, until, None, after,
+                         district)
+
+    return _stream("rescue_centers", _rows(build_query, lambda c: {f: getattr(c, f) for f in CENTER_FIELDS}),
+                   format, gzip)
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlalchemy.orm import Session
+from database import get_db
+import models, schemas
+import flood_store
+from routers.tasks import get_current_user
+from datetime import date
+from typing import List, Optional
+
+router = APIRouter()
+
+
+def _extent(db: Session, day: Optional[date]):
+    extent = flood_store.store.extent(db, day)
+    if extent is None:
+        raise HTTPException(status_code=404, detail="No flood polygons for this date")
+    return extent
+
+
+@router.post("/")
+def ingest_flood_polygons(feature_collection: dict = Body(...), date: Optional[date] = None,
+                          db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Store a GeoJSON FeatureCollection of flood polygons (as written by Extract.py)."""
+    if current_user.role != "district":
+        raise HTTPException(status_code=403, detail="Only district authorities can upload flood extents")
+    if feature_collection.get("type") != "FeatureCollection":
+        raise HTTPException(status_code=400, detail="Expected a GeoJSON FeatureCollection")
+    stored = flood_store.store.ingest(db, feature_collection, date)
+    if not stored:
+        raise HTTPException(status_code=400, detail="No dated polygon features found")
+    return {"stored": stored}
+
+
+@router.get("/")
+def get_flood_polygons(date: Optional[date] = None, db: Session = Depends(get_db)):
+    return _extent(db, date).feature_collection()
+
+
+@router.get("/hazard")
+def get_hazard_model(date: Optional[date] = None, db: Session = Depends(get_db)):
+    """GraphHopper custom_model that blocks roads inside the flood extent."""
+    return {
+        "areas": {"flood_zones": _extent(db, date).hazard_feature()},
+        "priority": [{"if": "in_flood_zones", "multiply_by": 0}],
+    }
+
+
+@router.post("/classify", response_model=List[schemas.FloodClassification])
+def classify_points(request: schemas.FloodClassifyRequest, db: Session = Depends(get_db)):
+    extent = _extent(db, request.date)
+    polygon_ids = extent.classify([p.latitude for p in request.points], [p.longitude for p in request.points])
+    return [{"id": p.id, "inside": pid is not None, "polygon_id": pid}
+            for p, pid in zip(request.points, polygon_ids)]
+
+
+@router.get("/affected")
+def get_affected(date: Optional[date] = None, db: Session = Depends(get_db)):
+    """Reports, open tasks and rescue centers located inside the flood extent."""
+    extent = _extent(db, date)
+    bounds = extent.bounds()
+    if bounds is None:
+        return {"reports": [], "tasks": [], "rescue_centers": []}
+    south, west, north, east = bounds
+
+    def inside(model, query):
+        rows = (query.filter(model.latitude >= south, model.latitude <= north,
+                             model.longitude >= west, model.longitude <= east)
+                .with_entities(model.id, model.latitude, model.longitude).all())
+        polygon_ids = extent.classify([r.latitude for r in rows], [r.longitude for r in rows])
+        return [{"id": r.id, "polygon_id": pid} for r, pid in zip(rows, polygon_ids) if pid is not None]
+
+    return {
+        "reports": inside(models.Report, db.query(models.Report).filter(models.Report.status != "resolved")),
+        "tasks": inside(models.Task, db.query(models.Task).filter(models.Task.status.notin_(["rejected", "verified"]))),
+        "rescue_centers": inside(models.RescueCenter, db.query(models.RescueCenter)),
+    }
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from database import get_db
+import schemas
+import geocoding
+from typing import List, Optional
+
+router = APIRouter()
+
+
+@router.get("/", response_model=schemas.GeocodeResult)
+def geocode(name: str, district: Optional[str] = None, state: str = "Karnataka", remote: bool = True,
+            db: Session = Depends(get_db)):
+    result = geocoding.geocoder.resolve(db, name, district, state, remote)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return {"name": name, "district": district, **result}
+
+
+@router.post("/batch", response_model=List[schemas.GeocodeResult])
+def geocode_batch(request: schemas.GeocodeBatchRequest, db: Session = Depends(get_db)):
+    """Resolve many names at once; unresolved names come back without coordinates."""
+    if len(request.places) > 500:
+        raise HTTPException(status_code=400, detail="Maximum 500 places per batch")
+    items = [(p.name, p.district) for p in request.places]
+    results = geocoding.geocoder.resolve_many(db, items, request.state, request.remote)
+    return [{"name": name, "district": district, **(result or {})}
+            for (name, district), result in zip(items, results)]
+
+
+@router.get("/suggest")
+def suggest(prefix: str, limit: int = 10):
+    return geocoding.geocoder.suggest(prefix, min(max(limit, 1), 50))
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+from database import get_db
+import numpy as np
+import heatmap
+
+router = APIRouter()
+
+
+@router.get("/{layer}")
+def get_heatmap(layer: str, zoom: int = 2, window: str = "7d", format: str = "json", db: Session = Depends(get_db)):
+    """Density grid of a layer over the Karnataka bbox (row 0 is the northern edge).
+
+    format=json returns the non-zero cells, png an 8-bit grayscale image and
+    bin the raw little-endian float32 grid.
+    """
+    if layer not in heatmap.service.layers:
+        raise HTTPException(status_code=404, detail=f"Unknown layer. Choose from {list(heatmap.service.layers)}")
+    if window not in heatmap.WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {list(heatmap.WINDOWS)}")
+    if not 0 <= zoom < heatmap.ZOOM_LEVELS:
+        raise HTTPException(status_code=400, detail=f"zoom must be between 0 and {heatmap.ZOOM_LEVELS - 1}")
+    if format not in ("json", "png", "bin"):
+        raise HTTPException(status_code=400, detail="format must be json, png or bin")
+
+    heatmap.service.ensure_loaded(db)
+    size = heatmap.BASE_RES // 2 ** (heatmap.ZOOM_LEVELS - 1 - zoom)
+    headers = {
+        "X-Grid-Shape": f"{size},{size}",
+        "X-Grid-BBox": ",".join(str(v) for v in (heatmap.SOUTH, heatmap.WEST, heatmap.NORTH, heatmap.EAST)),
+        "Cache-Control": "max-age=30",
+    }
+    if format == "png":
+        return Response(heatmap.service.encoded(layer, window, zoom, "png"), media_type="image/png", headers=headers)
+    if format == "bin":
+        return Response(heatmap.service.encoded(layer, window, zoom, "bin"),
+                        media_type="application/octet-stream", headers=headers)
+
+    grid = np.flipud(heatmap.service.grid(layer, window, zoom))
+    rows, cols = np.nonzero(grid)
+    return {
+        "layer": layer,
+        "window": window,
+        "zoom": zoom,
+        "bbox": [heatmap.SOUTH, heatmap.WEST, heatmap.NORTH, heatmap.EAST],
+        "shape": [size, size],
+        "max": float(grid.max()) if grid.size else 0.0,
+        "cells": [[int(r), int(c), round(float(grid[r, c]), 4)] for r, c in zip(rows, cols)],
+    }
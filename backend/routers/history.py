@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from database import get_db
+import models, schemas
+import archive
+import districts
+from routers.tasks import get_optional_user
+from datetime import datetime
+from typing import List, Optional
+
+# Read-only access to archived (cold) reports and tasks.
+router = APIRouter()
+
+
+def _report_from_parquet(row):
+    row = dict(row)
+    row["images"] = [{"id": url, "image_url": url} for url in row.pop("image_urls", None) or []]
+    return row
+
+
+@router.get("/reports", response_model=List[schemas.ArchivedReportResponse])
+def get_archived_reports(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    severity: Optional[str] = None,
+    user_id: Optional[str] = None,
+    district: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user: Optional[models.User] = Depends(get_optional_user)
+):
+    limit = min(limit, 1000)
+    district = districts.filter_district(current_user, district)
+    if archive.ARCHIVE_BACKEND == "parquet":
+        filters = {k: v for k, v in {"severity": severity, "user_id": user_id, "district": district}.items() if v is not None}
+        rows = archive.read_parquet("reports", since, until, filters, limit, offset)
+        return [_report_from_parquet(r) for r in rows]
+
+    query = db.query(models.ArchivedReport)
+    if since:
+        query = query.filter(models.ArchivedReport.created_at >= since)
+    if until:
+        query = query.filter(models.ArchivedReport.created_at <= until)
+    if severity:
+        query = query.filter(models.ArchivedReport.severity == severity)
+    if user_id:
+        query = query.filter(models.ArchivedReport.user_id == user_id)
+    if district:
+        query = query.filter(models.ArchivedReport.district == district)
+    return query.order_by(models.ArchivedReport.created_at.desc()).offset(offset).limit(limit).all()
+
+
+@router.get("/reports/{report_id}", response_model=schemas.ArchivedReportResponse)
+def get_archived_report(report_id: str, db: Session = Depends(get_db),
+                        current_user: Optional[models.User] = Depends(get_optional_user)):
+    scope = districts.user_district(current_user)
+    if archive.ARCHIVE_BACKEND == "parquet":
+        rows = archive.read_parquet("reports", filters={"id": report_id}, limit=1)
+        if not rows or (scope and rows[0].get("district") != scope):
+            raise HTTPException(status_code=404, detail="Archived report not found")
+        return _report_from_parquet(rows[0])
+
+    report = (districts.scoped(db.query(models.ArchivedReport), models.ArchivedReport, current_user)
+              .filter(models.ArchivedReport.id == report_id).first())
+    if not report:
+        raise HTTPException(status_code=404, detail="Archived report not found")
+    return report
+
+
+@router.get("/tasks", response_model=List[schemas.ArchivedTaskResponse])
+def get_archived_tasks(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    volunteer_id: Optional[str] = None,
+    report_id: Optional[str] = None,
+    district: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user: Optional[models.User] = Depends(get_optional_user)
+):
+    limit = min(limit, 1000)
+    district = districts.filter_district(current_user, district)
+    if archive.ARCHIVE_BACKEND == "parquet":
+        filters = {k: v for k, v in {"volunteer_id": volunteer_id, "report_id": report_id, "district": district}.items() if v is not None}
+        return archive.read_parquet("tasks", since, until, filters, limit, offset)
+
+    query = db.query(models.ArchivedTask)
+    if since:
+        query = query.filter(models.ArchivedTask.created_at >= since)
+    if until:
+        query = query.filter(models.ArchivedTask.created_at <= until)
+    if volunteer_id:
+        query = query.filter(models.ArchivedTask.volunteer_id == volunteer_id)
+    if report_id:
+        query = query.filter(models.ArchivedTask.report_id == report_id)
+    if district:
+        query = query.filter(models.ArchivedTask.district == district)
+    return query.order_by(models.ArchivedTask.created_at.desc()).offset(offset).limit(limit).all()
+
+
+@router.get("/tasks/{task_id}", response_model=schemas.ArchivedTaskResponse)
+def get_archived_task(task_id: str, db: Session = Depends(get_db),
+                      current_user: Optional[models.User] = Depends(get_optional_user)):
+    scope = districts.user_district(current_user)
+    if archive.ARCHIVE_BACKEND == "parquet":
+        rows = archive.read_parquet("tasks", filters={"id": task_id}, limit=1)
+        if not rows or (scope and rows[0].get("district") != scope):
+            raise HTTPException(status_code=404, detail="Archived task not found")
+        return rows[0]
+
+    task = (districts.scoped(db.query(models.ArchivedTask), models.ArchivedTask, current_user)
+            .filter(models.ArchivedTask.id == task_id).first())
+    if not task:
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    return task
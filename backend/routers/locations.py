@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from database import get_db
+import models, schemas
+import locations
+from routers.tasks import get_current_user
+from datetime import datetime, timezone
+from typing import List, Optional
+import time
+
+router = APIRouter()
+
+MAX_PINGS_PER_BATCH = 1000
+
+
+def _epoch(dt):
+    """Epoch seconds of a datetime; naive values are UTC like the rest of the API."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _require_district(current_user: models.User):
+    if current_user.role != "district":
+        raise HTTPException(status_code=403, detail="Only district authorities can view volunteer locations")
+
+
+@router.post("/pings", status_code=202)
+def post_pings(batch: schemas.LocationPingBatch, current_user: models.User = Depends(get_current_user)):
+    """Batched GPS fixes from a volunteer's device."""
+    if current_user.role != "volunteer":
+        raise HTTPException(status_code=403, detail="Only volunteers can send location pings")
+    if len(batch.pings) > MAX_PINGS_PER_BATCH:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PINGS_PER_BATCH} pings per batch")
+    now = time.time()
+    # Clamp device clocks running ahead, which would otherwise pin the latest fix
+    pings = [(min(_epoch(p.timestamp), now) if p.timestamp else now, p.latitude, p.longitude)
+             for p in batch.pings]
+    accepted = locations.positions.ingest(current_user.id, pings)
+    return {"accepted": accepted}
+
+
+def _nearby(lat, lng, radius_km, max_age):
+    return [{"volunteer_id": vid, "latitude": plat, "longitude": plon,
+             "distance_km": round(d, 3), "last_seen": datetime.utcfromtimestamp(ts)}
+            for d, vid, ts, plat, plon in locations.positions.nearby(lat, lng, radius_km, max_age)]
+
+
+@router.get("/nearby", response_model=List[schemas.NearbyVolunteer])
+def get_nearby_volunteers(lat: float, lng: float, radius_km: float = 5.0, max_age: float = locations.LIVE_MAX_AGE,
+                          current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    return _nearby(lat, lng, min(radius_km, 100.0), max_age)
+
+
+@router.get("/nearby/report/{report_id}", response_model=List[schemas.NearbyVolunteer])
+def get_volunteers_near_report(report_id: str, radius_km: float = 5.0, max_age: float = locations.LIVE_MAX_AGE,
+                               db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    report = db.query(models.Report).filter(models.Report.id == report_id).first()
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return _nearby(report.latitude, report.longitude, min(radius_km, 100.0), max_age)
+
+
+@router.get("/{volunteer_id}/trail")
+def get_trail(volunteer_id: str, since: Optional[datetime] = None, db: Session = Depends(get_db),
+              current_user: models.User = Depends(get_current_user)):
+    """Persisted (downsampled) trail plus the raw pings still in memory.
+
+    District authorities can read any trail, volunteers only their own.
+    """
+    if current_user.role != "district" and current_user.id != volunteer_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this trail")
+    if since and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    query = db.query(models.VolunteerTrailPoint).filter(models.VolunteerTrailPoint.volunteer_id == volunteer_id)
+    if since:
+        query = query.filter(models.VolunteerTrailPoint.recorded_at >= since)
+    stored = query.order_by(models.VolunteerTrailPoint.recorded_at).limit(5000).all()
+    recent = locations.positions.recent(volunteer_id, _epoch(since) if since else 0.0)
+    return {
+        "trail": [{"recorded_at": p.recorded_at, "latitude": p.latitude, "longitude": p.longitude} for p in stored],
+        "recent": [{"recorded_at": datetime.utcfromtimestamp(ts), "latitude": lat, "longitude": lon}
+                   for ts, lat, lon in recent.tolist()],
+    }
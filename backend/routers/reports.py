@@ -1,8 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import ingest
+import triage
+import heatmap
+import lifecycle
+import districts
+from routers.tasks import get_current_user, get_optional_user
 from typing import List, Optional
+import datetime
 import shutil
 import os
 import uuid
@@ -13,6 +21,10 @@ UPLOAD_DIR = "uploads"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
+def _require_district(current_user: models.User):
+    if current_user.role != "district":
+        raise HTTPException(status_code=403, detail="Only district authorities can edit or delete reports")
+
 @router.post("/", response_model=schemas.ReportResponse)
 async def create_report(
     title: str = Form(...),
@@ -21,6 +33,7 @@ async def create_report(
     latitude: float = Form(...),
     longitude: float = Form(...),
     user_id: str = Form(...),
+    client_id: Optional[str] = Form(None),
     images: List[UploadFile] = File(None),
     db: Session = Depends(get_db)
 ):
@@ -31,12 +44,17 @@ async def create_report(
     # Handle anonymous reports
     final_user_id = user_id if user_id != "anonymous" else None
 
+    if ingest.writer is not None:
+        return _enqueue_report(title, description, severity, latitude, longitude,
+                               final_user_id, client_id, images)
+
     new_report = models.Report(
         title=title,
         description=description,
         severity=severity,
         latitude=latitude,
         longitude=longitude,
+        district=districts.district_for(latitude, longitude),
         user_id=final_user_id
     )
     db.add(new_report)
@@ -44,46 +62,111 @@ async def create_report(
     db.refresh(new_report)
 
     if images:
-        for image in images:
-            file_extension = image.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(UPLOAD_DIR, file_name)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            
+        for image_url in _save_images(images):
             new_image = models.ReportImage(
                 report_id=new_report.id,
-                image_url=f"/uploads/{file_name}"
+                image_url=image_url
             )
             db.add(new_image)
         
         db.commit()
         db.refresh(new_report)
-        
+
+    triage.engine.add_report(new_report)
+    heatmap.service.report_changed(new_report)
     return new_report
 
+def _save_images(images):
+    image_urls = []
+    for image in images:
+        file_extension = image.filename.split(".")[-1]
+        file_name = f"{uuid.uuid4()}.{file_extension}"
+        file_path = os.path.join(UPLOAD_DIR, file_name)
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(image.file, buffer)
+        image_urls.append(f"/uploads/{file_name}")
+    return image_urls
+
+def _enqueue_report(title, description, severity, latitude, longitude, user_id, client_id, images):
+    """Queue-mode ingestion: spool the report and acknowledge with 202."""
+    try:
+        report_id = str(uuid.UUID(client_id)) if client_id else str(uuid.uuid4())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="client_id must be a UUID")
+
+    # Back-pressure: refuse before writing any image files
+    if ingest.spool.full():
+        return _queue_full()
+
+    report = schemas.ReportCreate(title=title, description=description, severity=severity,
+                                  latitude=latitude, longitude=longitude)
+    payload = report.dict()
+    payload["user_id"] = user_id
+    payload["created_at"] = datetime.datetime.utcnow().isoformat()
+    payload["image_urls"] = _save_images(images) if images else []
+
+    try:
+        ingest.spool.append(report_id, payload)
+    except ingest.QueueFull:
+        return _queue_full()
+
+    return JSONResponse(status_code=202, content={"id": report_id, "status": "queued"})
+
+def _queue_full():
+    return JSONResponse(status_code=503, content={"detail": "Report queue is full, retry shortly"},
+                        headers={"Retry-After": "5"})
+
+@router.get("/ingest/{report_id}")
+def get_ingest_state(report_id: str, db: Session = Depends(get_db)):
+    """Where a queued report is: still queued, stored, or failed (dead-lettered)."""
+    state = ingest.spool.state(report_id) if ingest.spool is not None else None
+    if state is None:
+        if db.query(models.Report.id).filter(models.Report.id == report_id).first():
+            state = "stored"
+        else:
+            raise HTTPException(status_code=404, detail="Report not found")
+    return {"id": report_id, "status": state}
+
 @router.get("/", response_model=List[schemas.ReportResponse])
-def get_reports(db: Session = Depends(get_db)):
-    return db.query(models.Report).all()
+def get_reports(district: Optional[str] = None, db: Session = Depends(get_db),
+                current_user: Optional[models.User] = Depends(get_optional_user)):
+    query = db.query(models.Report)
+    district = districts.filter_district(current_user, district)
+    if district:
+        query = query.filter(models.Report.district == district)
+    return query.all()
 
 
 @router.patch("/{report_id}", response_model=schemas.ReportResponse)
-def update_report(report_id: str, report_update: schemas.ReportUpdate, db: Session = Depends(get_db)):
-    report = db.query(models.Report).filter(models.Report.id == report_id).first()
+def update_report(report_id: str, report_update: schemas.ReportUpdate, db: Session = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    report = (districts.scoped(db.query(models.Report), models.Report, current_user)
+              .filter(models.Report.id == report_id).first())
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
     if report_update.status is not None:
+        lifecycle.log_report(db, report, report.status, current_user.id, status=report_update.status)
         report.status = report_update.status
-        
+    if report_update.zone is not None:
+        report.zone = report_update.zone.strip() or None
+
     db.commit()
     db.refresh(report)
+    triage.engine.sync_report(db, report.id)
+    heatmap.service.report_changed(report)
     return report
 
 @router.get("/zones")
-def get_zones(db: Session = Depends(get_db)):
+def get_zones(district: Optional[str] = None, db: Session = Depends(get_db),
+              current_user: Optional[models.User] = Depends(get_optional_user)):
     """Return a summary of zones and the reports in each zone."""
-    reports = db.query(models.Report).filter(models.Report.zone != None).all()
+    query = db.query(models.Report).filter(models.Report.zone != None)
+    district = districts.filter_district(current_user, district)
+    if district:
+        query = query.filter(models.Report.district == district)
+    reports = query.all()
     zones = {}
     for r in reports:
         zones.setdefault(r.zone, []).append({
@@ -98,8 +181,11 @@ def get_zones(db: Session = Depends(get_db)):
     return zones
 
 @router.delete("/{report_id}")
-def delete_report(report_id: str, db: Session = Depends(get_db)):
-    report = db.query(models.Report).filter(models.Report.id == report_id).first()
+def delete_report(report_id: str, db: Session = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    report = (districts.scoped(db.query(models.Report), models.Report, current_user)
+              .filter(models.Report.id == report_id).first())
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
@@ -120,7 +206,10 @@ def delete_report(report_id: str, db: Session = Depends(get_db)):
                 except Exception as e:
                     print(f"Error deleting file {file_path}: {e}")
     
+    lifecycle.log_report(db, report, report.status, current_user.id, status="deleted")
     db.delete(report)
     db.commit()
+    triage.engine.remove_report(report_id)
+    heatmap.service.report_removed(report_id)
     return {"message": "Report deleted successfully"}
 
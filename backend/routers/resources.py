@@ -2,28 +2,91 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
-from typing import List
+import occupancy
+import districts
+from routers.tasks import get_current_user, get_optional_user
+from typing import List, Optional
 
 router = APIRouter()
 
 @router.post("/rescue-centers/", response_model=schemas.RescueCenterResponse)
 def create_rescue_center(center: schemas.RescueCenterCreate, db: Session = Depends(get_db)):
     new_center = models.RescueCenter(**center.dict())
+    new_center.district = districts.district_for(center.latitude, center.longitude)
     db.add(new_center)
     db.commit()
     db.refresh(new_center)
+    occupancy.index.upsert(new_center)
     return new_center
 
 @router.get("/rescue-centers/", response_model=List[schemas.RescueCenterResponse])
-def get_rescue_centers(db: Session = Depends(get_db)):
-    return db.query(models.RescueCenter).all()
+def get_rescue_centers(district: Optional[str] = None, db: Session = Depends(get_db),
+                       current_user: Optional[models.User] = Depends(get_optional_user)):
+    query = db.query(models.RescueCenter)
+    district = districts.filter_district(current_user, district)
+    if district:
+        query = query.filter(models.RescueCenter.district == district)
+    return query.all()
+
+@router.get("/rescue-centers/available", response_model=List[schemas.RescueCenterAvailability])
+def get_available_rescue_centers(
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    min_beds: int = 1,
+    limit: int = 5,
+    max_km: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    """Nearest centers with at least `min_beds` free beds (or the emptiest ones if no location)."""
+    occupancy.index.ensure_loaded(db)
+    limit = min(max(limit, 1), 100)
+    if lat is not None and lng is not None:
+        matches = occupancy.index.nearest(lat, lng, min_beds, limit, max_km)
+    else:
+        matches = occupancy.index.most_free(min_beds, limit)
+
+    centers = {c.id: c for c in db.query(models.RescueCenter)
+               .filter(models.RescueCenter.id.in_([m["id"] for m in matches]))}
+    result = []
+    for m in matches:
+        c = centers.get(m["id"])
+        if c is None:
+            continue
+        result.append({
+            "id": c.id, "name": c.name, "address": c.address,
+            "capacity": c.capacity, "occupancy": c.occupancy,
+            "free_beds": c.capacity - c.occupancy,
+            "latitude": c.latitude, "longitude": c.longitude,
+            "distance_km": m["distance_km"],
+        })
+    return [r for r in result if r["free_beds"] >= min_beds]
+
+@router.post("/rescue-centers/{center_id}/reserve", response_model=schemas.RescueCenterResponse)
+def reserve_beds(center_id: str, reservation: schemas.BedReservation, db: Session = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
+    """Reserve beds for evacuees; any signed-in volunteer or authority may do this."""
+    if occupancy.reserve_beds(db, center_id, reservation.beds) is None:
+        if not db.query(models.RescueCenter.id).filter(models.RescueCenter.id == center_id).first():
+            raise HTTPException(status_code=404, detail="Rescue center not found")
+        raise HTTPException(status_code=409, detail="Not enough free beds at this rescue center")
+    return db.query(models.RescueCenter).filter(models.RescueCenter.id == center_id).first()
+
+@router.post("/rescue-centers/{center_id}/release", response_model=schemas.RescueCenterResponse)
+def release_beds(center_id: str, reservation: schemas.BedReservation, db: Session = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
+    if occupancy.release_beds(db, center_id, reservation.beds) is None:
+        if not db.query(models.RescueCenter.id).filter(models.RescueCenter.id == center_id).first():
+            raise HTTPException(status_code=404, detail="Rescue center not found")
+        raise HTTPException(status_code=409, detail="Cannot release more beds than are occupied")
+    return db.query(models.RescueCenter).filter(models.RescueCenter.id == center_id).first()
 
 @router.delete("/rescue-centers/{center_id}")
 def delete_rescue_center(center_id: str, db: Session = Depends(get_db)):
     center = db.query(models.RescueCenter).filter(models.RescueCenter.id == center_id).first()
     if not center:
         raise HTTPException(status_code=404, detail="Rescue center not found")
-    
+
     db.delete(center)
     db.commit()
+    occupancy.index.remove(center_id)
     return {"message": "Rescue center deleted successfully"}
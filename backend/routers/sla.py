@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from database import get_db
+import models, schemas
+import lifecycle
+import districts
+from routers.tasks import get_current_user
+from typing import List
+
+# Response-time metrics for the dashboard. Durations are in seconds; windows
+# are the last `hours` hours (at most LIFECYCLE_RETENTION_HOURS). A district
+# authority with a district set only gets its own district: the summary, the
+# zone and volunteer breakdowns and the timelines are limited to it.
+router = APIRouter()
+
+
+def _require_district(current_user: models.User):
+    if current_user.role != "district":
+        raise HTTPException(status_code=403, detail="Only district authorities can view SLA metrics")
+
+
+def _window(hours):
+    return max(1, min(hours, lifecycle.RETENTION_HOURS))
+
+
+@router.get("/summary")
+def get_summary(hours: int = 24, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    lifecycle.analytics.ensure_loaded(db)
+    hours = _window(hours)
+    district = districts.user_district(current_user)
+    if district:
+        return dict(lifecycle.analytics.stats("district", district, hours), hours=hours, district=district)
+    return dict(lifecycle.analytics.stats("all", "", hours), hours=hours)
+
+
+def _breakdown(dimension, hours, stage, limit, district=None):
+    hours = _window(hours)
+    if not district:
+        keys = [(dimension, key, key) for key in lifecycle.analytics.keys(dimension)]
+    elif dimension == "district":
+        keys = [(dimension, district, district)]
+    else:
+        # Per-district keys are (district, zone) / (district, volunteer_id)
+        scoped = "district_" + dimension
+        keys = [(scoped, key, key[1]) for key in lifecycle.analytics.keys(scoped) if key[0] == district]
+    rows = []
+    for dim, key, label in keys:
+        stats = lifecycle.analytics.stats(dim, key, hours)
+        if stats["stages"] or stats["decisions"]:
+            rows.append(dict(stats, key=label))
+    if stage:
+        # Slowest first on the requested stage
+        rows.sort(key=lambda r: -(r["stages"].get(stage, {}).get("p90") or -1))
+    return {"hours": hours, dimension + "s": rows[:limit]}
+
+
+@router.get("/zones")
+def get_zone_metrics(hours: int = 24, stage: str = None, limit: int = Query(100, le=1000),
+                     db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    lifecycle.analytics.ensure_loaded(db)
+    return _breakdown("zone", hours, stage, limit, districts.user_district(current_user))
+
+
+@router.get("/districts")
+def get_district_metrics(hours: int = 24, stage: str = None, limit: int = Query(100, le=1000),
+                         db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    lifecycle.analytics.ensure_loaded(db)
+    return _breakdown("district", hours, stage, limit, districts.user_district(current_user))
+
+
+@router.get("/volunteers")
+def get_volunteer_metrics(hours: int = 24, stage: str = None, limit: int = Query(100, le=1000),
+                          db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    _require_district(current_user)
+    lifecycle.analytics.ensure_loaded(db)
+    return _breakdown("volunteer", hours, stage, limit, districts.user_district(current_user))
+
+
+@router.get("/timeline/{entity_id}", response_model=List[schemas.LifecycleEventResponse])
+def get_timeline(entity_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Every logged transition of one task or report, oldest first."""
+    _require_district(current_user)
+    return (districts.scoped(db.query(models.LifecycleEvent), models.LifecycleEvent, current_user)
+            .filter(models.LifecycleEvent.entity_id == entity_id)
+            .order_by(models.LifecycleEvent.at, models.LifecycleEvent.id)
+            .all())
@@ -2,15 +2,30 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from database import get_db
 import models
+import districts
+from routers.tasks import get_optional_user
+from typing import Optional
 
 router = APIRouter()
 
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    reports_count = db.query(models.Report).count()
-    volunteers_count = db.query(models.User).filter(models.User.role == "volunteer").count()
-    districts_count = db.query(models.User).filter(models.User.role == "district").count()
-    rescue_centers_count = db.query(models.RescueCenter).count()
+def get_stats(district: Optional[str] = None, db: Session = Depends(get_db),
+              current_user: Optional[models.User] = Depends(get_optional_user)):
+    district = districts.filter_district(current_user, district)
+    reports = db.query(models.Report)
+    # Volunteers have no district, so their count is always statewide
+    volunteers = db.query(models.User).filter(models.User.role == "volunteer")
+    district_users = db.query(models.User).filter(models.User.role == "district")
+    rescue_centers = db.query(models.RescueCenter)
+    if district:
+        reports = reports.filter(models.Report.district == district)
+        district_users = district_users.filter(models.User.district == district)
+        rescue_centers = rescue_centers.filter(models.RescueCenter.district == district)
+
+    reports_count = reports.count()
+    volunteers_count = volunteers.count()
+    districts_count = district_users.count()
+    rescue_centers_count = rescue_centers.count()
     
     return {
         "reports": reports_count,
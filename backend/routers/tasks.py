@@ -2,15 +2,20 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import triage
+import heatmap
+import lifecycle
+import districts
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
-from typing import List
+from typing import List, Optional
 
 # Security (Should be in env vars/config)
 SECRET_KEY = "YOUR_SECRET_KEY_HERE_CHANGE_IN_PROD"
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 router = APIRouter()
 
@@ -33,6 +38,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     return user
 
+def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)):
+    """The caller on endpoints that are also open to anonymous users.
+
+    None without a token, and also for an expired or invalid one, so a stale
+    dashboard session still loads public pages.
+    """
+    if token is None:
+        return None
+    try:
+        return get_current_user(token, db)
+    except HTTPException:
+        return None
+
 @router.post("/", response_model=schemas.TaskResponse)
 def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     if current_user.role != "district":
@@ -46,15 +64,20 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db), current
     lat = task.latitude
     lng = task.longitude
 
+    district = zone = None
     if task.report_id:
-        report = db.query(models.Report).filter(models.Report.id == task.report_id).first()
+        report = (districts.scoped(db.query(models.Report), models.Report, current_user)
+                  .filter(models.Report.id == task.report_id).first())
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
+        district = report.district
+        zone = report.zone
         # Inherit from report if not provided
         if lat is None: lat = report.latitude
         if lng is None: lng = report.longitude
         # If assigning a task to a report, ensure the report is moved out of 'zone' category
-        # (mutual exclusivity: report -> either zone OR task). Clear zone if present.
+        # (mutual exclusivity: report -> either zone OR task). Clear zone if present;
+        # the task keeps it so lifecycle events stay attributed to the zone.
         # Prevent assigning a new task to a report that already has an active task
         active = db.query(models.Task).filter(models.Task.report_id == task.report_id).filter(models.Task.status.notin_(["rejected", "verified"]))
         if active.count() > 0:
@@ -68,6 +91,12 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db), current
     if not task.report_id and (lat is None or lng is None):
         raise HTTPException(status_code=400, detail="Location (latitude and longitude) is mandatory for manual tasks")
 
+    if district is None:
+        district = districts.district_for(lat, lng)
+    scope = districts.user_district(current_user)
+    if scope and district != scope:
+        raise HTTPException(status_code=403, detail="Task location is outside your district")
+
     new_task = models.Task(
         title=task.title,
         description=task.description,
@@ -77,11 +106,17 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db), current
         status="assigned",
         latitude=lat,
         longitude=lng,
-        
+        zone=zone,
+        district=district,
     )
     db.add(new_task)
+    db.flush()
+    lifecycle.log_task(db, new_task, None, current_user.id)
     db.commit()
     db.refresh(new_task)
+    if new_task.report_id:
+        triage.engine.remove_report(new_task.report_id)
+    heatmap.service.task_changed(new_task)
     return new_task
 
 @router.get("/", response_model=List[schemas.TaskResponse])
@@ -93,8 +128,8 @@ def get_tasks(
     query = db.query(models.Task)
     
     if current_user.role == "district":
-        # District sees all tasks, optionally filtered
-        pass
+        # District sees the tasks of its own district (all tasks if it has none)
+        query = districts.scoped(query, models.Task, current_user)
     else:
         # Volunteer sees only their tasks
         query = query.filter(models.Task.volunteer_id == current_user.id)
@@ -107,7 +142,7 @@ def get_tasks(
 
 @router.put("/{task_id}", response_model=schemas.TaskResponse)
 def update_task_status(task_id: str, task_update: schemas.TaskUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    task = districts.scoped(db.query(models.Task), models.Task, current_user).filter(models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -131,6 +166,7 @@ def update_task_status(task_id: str, task_update: schemas.TaskUpdate, db: Sessio
         # District can do anything, but specifically they verify
         pass
     
+    previous_status = task.status
     task.status = task_update.status
 
     if task.status == "completed" or task.status == "verified":
@@ -142,6 +178,7 @@ def update_task_status(task_id: str, task_update: schemas.TaskUpdate, db: Sessio
     if task.report_id:
         report = db.query(models.Report).filter(models.Report.id == task.report_id).first()
         if report:
+            previous_report_status = report.status
             if task.status == "verified":
                 report.status = "resolved"
             elif task.status == "completed":
@@ -155,15 +192,24 @@ def update_task_status(task_id: str, task_update: schemas.TaskUpdate, db: Sessio
                 # If rejected, maybe report goes back to new? Or stays as is?
                 # Let's leave it as is for now, or maybe 'new' if it was 'in-progress'.
                 pass
+            lifecycle.log_report(db, report, previous_report_status, current_user.id)
+
+    lifecycle.log_task(db, task, previous_status, current_user.id)
 
     db.commit()
     db.refresh(task)
+    if task.report_id:
+        triage.engine.sync_report(db, task.report_id)
+        report = db.query(models.Report).filter(models.Report.id == task.report_id).first()
+        if report:
+            heatmap.service.report_changed(report)
+    heatmap.service.task_changed(task)
     return task
 
 
 @router.delete("/{task_id}")
 def delete_task(task_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    task = districts.scoped(db.query(models.Task), models.Task, current_user).filter(models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -176,9 +222,16 @@ def delete_task(task_id: str, db: Session = Depends(get_db), current_user: model
     if task.report_id:
         report = db.query(models.Report).filter(models.Report.id == task.report_id).first()
         if report:
+            lifecycle.log_report(db, report, report.status, current_user.id, status="new")
             report.status = "new"
             db.add(report)
 
+    lifecycle.log_task(db, task, task.status, current_user.id, status="deleted")
+
+    report_id = task.report_id
     db.delete(task)
     db.commit()
+    if report_id:
+        triage.engine.sync_report(db, report_id)
+    heatmap.service.task_removed(task_id)
     return {"detail": "deleted"}
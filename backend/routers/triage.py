@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from database import get_db
+import models, schemas
+import triage
+import districts
+from routers.tasks import get_current_user
+from typing import List
+
+router = APIRouter()
+
+
+def _require_district(current_user: models.User):
+    if current_user.role != "district":
+        raise HTTPException(status_code=403, detail="Only district authorities can use the triage queue")
+
+
+def _with_reports(entries, db: Session):
+    reports = {r.id: r for r in db.query(models.Report)
+               .filter(models.Report.id.in_([e["report_id"] for e in entries]))}
+    return [dict(e, report=reports[e["report_id"]]) for e in entries if e["report_id"] in reports]
+
+
+@router.get("/next", response_model=schemas.TriageEntry)
+def get_next_report(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """The most urgent unassigned report."""
+    _require_district(current_user)
+    triage.engine.ensure_loaded(db)
+    entry = triage.engine.next(districts.user_district(current_user))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No unassigned reports")
+    result = _with_reports([entry], db)
+    if not result:
+        # Deleted by another worker since the last reload
+        triage.engine.remove_report(entry["report_id"])
+        return get_next_report(db, current_user)
+    return result[0]
+
+
+@router.get("/top", response_model=List[schemas.TriageEntry])
+def get_top_reports(k: int = 10, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """The k most urgent unassigned reports, most urgent first."""
+    _require_district(current_user)
+    triage.engine.ensure_loaded(db)
+    k = min(max(k, 1), 200)
+    return _with_reports(triage.engine.top(k, districts.user_district(current_user)), db)
@@ -0,0 +1,19 @@
+from database import SessionLocal
+import archive
+import sys
+
+def main():
+    older_than_days = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    db = SessionLocal()
+    try:
+        counts = archive.run_archive(db, older_than_days=older_than_days)
+        print(f"Archived {counts['tasks']} tasks and {counts['reports']} reports "
+              f"(backend: {archive.ARCHIVE_BACKEND}).")
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
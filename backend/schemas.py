@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date as Date
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -8,6 +8,7 @@ class UserBase(BaseModel):
     name: str
     address: Optional[str] = None
     role: str
+    district: Optional[str] = None
 
 class UserCreate(UserBase):
     password: str
@@ -50,6 +51,7 @@ class ReportImageResponse(BaseModel):
 class ReportResponse(ReportBase):
     id: str
     status: str
+    district: Optional[str] = None
     created_at: datetime
     user_id: Optional[str]
     images: List[ReportImageResponse] = []
@@ -70,11 +72,27 @@ class RescueCenterCreate(RescueCenterBase):
 
 class RescueCenterResponse(RescueCenterBase):
     id: str
+    occupancy: int = 0
+    district: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class BedReservation(BaseModel):
+    beds: int = Field(1, gt=0)
+
+class RescueCenterAvailability(BaseModel):
+    id: str
+    name: str
+    address: str
+    capacity: int
+    occupancy: int
+    free_beds: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_km: Optional[float] = None
+
 class TaskBase(BaseModel):
     title: str
     description: str
@@ -93,6 +111,7 @@ class TaskUpdate(BaseModel):
 class TaskResponse(TaskBase):
     id: str
     status: str
+    district: Optional[str] = None
     created_at: datetime
     completed_at: Optional[datetime] = None
 
@@ -105,3 +124,103 @@ class Token(BaseModel):
     role: str
     user_id: str
     name: str
+
+class ArchivedReportResponse(ReportBase):
+    id: str
+    status: str
+    district: Optional[str] = None
+    created_at: Optional[datetime] = None
+    user_id: Optional[str] = None
+    archived_at: Optional[datetime] = None
+    images: List[ReportImageResponse] = []
+
+    class Config:
+        from_attributes = True
+
+class ArchivedTaskResponse(BaseModel):
+    id: str
+    title: str
+    description: str
+    status: str
+    priority: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    zone: Optional[str] = None
+    district: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    volunteer_id: Optional[str] = None
+    report_id: Optional[str] = None
+    archived_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class TriageEntry(BaseModel):
+    report_id: str
+    score: float
+    cluster_size: int
+    nearest_volunteer_km: Optional[float] = None
+    report: ReportResponse
+
+class GeocodeQuery(BaseModel):
+    name: str
+    district: Optional[str] = None
+
+class GeocodeBatchRequest(BaseModel):
+    places: List[GeocodeQuery]
+    state: str = "Karnataka"
+    remote: bool = True
+
+class GeocodeResult(BaseModel):
+    name: str
+    district: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    display_name: Optional[str] = None
+    source: Optional[str] = None
+
+class FloodPoint(BaseModel):
+    id: Optional[str] = None
+    latitude: float
+    longitude: float
+
+class FloodClassifyRequest(BaseModel):
+    points: List[FloodPoint]
+    date: Optional[Date] = None
+
+class FloodClassification(BaseModel):
+    id: Optional[str] = None
+    inside: bool
+    polygon_id: Optional[str] = None
+
+class LocationPing(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    timestamp: Optional[datetime] = None
+
+class LocationPingBatch(BaseModel):
+    pings: List[LocationPing]
+
+class NearbyVolunteer(BaseModel):
+    volunteer_id: str
+    latitude: float
+    longitude: float
+    distance_km: float
+    last_seen: datetime
+
+class LifecycleEventResponse(BaseModel):
+    id: int
+    at: datetime
+    entity: str
+    entity_id: str
+    from_status: Optional[str] = None
+    to_status: str
+    elapsed_seconds: Optional[float] = None
+    zone: Optional[str] = None
+    district: Optional[str] = None
+    volunteer_id: Optional[str] = None
+    actor_id: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,313 @@
+"""Triage engine: keeps unassigned reports in an indexed priority heap.
+
+A report is unassigned while it is not resolved, has no zone and has no active
+task. Its urgency score combines severity, age, the number of unassigned
+reports clustered around it and how close the nearest free volunteer is.
+
+The age term grows at the same rate for every report, so it is stored as
+`-AGE_WEIGHT * created_hours` and the heap order stays valid as time passes.
+Cluster sizes are updated incrementally when neighbouring reports come and go.
+Volunteer distances use live GPS positions (locations.py) where available and
+are refreshed on every full reload (TRIAGE_RELOAD_INTERVAL). Each district also
+has its own heap, so a district authority's queue only holds its own reports.
+"""
+from sqlalchemy.orm import Session
+import models
+import geo
+import locations
+import threading
+import datetime
+import math
+import time
+import os
+
+SEVERITY_WEIGHT = 1.0        # severity is 0-100
+AGE_WEIGHT = 2.0             # points per hour waiting
+CLUSTER_WEIGHT = 10.0        # times log(1 + neighbouring reports)
+VOLUNTEER_WEIGHT = 15.0      # full bonus when a free volunteer is on site
+VOLUNTEER_HALF_KM = 5.0      # bonus halves at this distance
+CLUSTER_KM = 2.0
+RELOAD_INTERVAL = float(os.getenv("TRIAGE_RELOAD_INTERVAL", "300"))
+
+ACTIVE_TASK_STATUSES = ["assigned", "accepted", "completed"]
+SEVERITY_WORDS = {"low": 25.0, "medium": 50.0, "high": 75.0, "critical": 100.0}
+
+
+def severity_value(severity):
+    try:
+        return max(0.0, min(100.0, float(severity)))
+    except (TypeError, ValueError):
+        return SEVERITY_WORDS.get(str(severity).strip().lower(), 50.0)
+
+
+def _hours(dt):
+    return (dt or datetime.datetime.utcnow()).replace(tzinfo=None).timestamp() / 3600.0
+
+
+class IndexedHeap:
+    """Binary max-heap of (priority, id) with O(log n) update and removal by id."""
+
+    def __init__(self):
+        self.heap = []  # [priority, id]
+        self.pos = {}   # id -> index in heap
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item_id):
+        return item_id in self.pos
+
+    def _swap(self, i, j):
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.pos[self.heap[i][1]] = i
+        self.pos[self.heap[j][1]] = j
+
+    def _up(self, i):
+        while i > 0:
+            parent = (i - 1) // 2
+            if self.heap[i][0] <= self.heap[parent][0]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _down(self, i):
+        n = len(self.heap)
+        while True:
+            largest, left, right = i, 2 * i + 1, 2 * i + 2
+            if left < n and self.heap[left][0] > self.heap[largest][0]:
+                largest = left
+            if right < n and self.heap[right][0] > self.heap[largest][0]:
+                largest = right
+            if largest == i:
+                return
+            self._swap(i, largest)
+            i = largest
+
+    def push(self, item_id, priority):
+        if item_id in self.pos:
+            self.update(item_id, priority)
+            return
+        self.heap.append([priority, item_id])
+        self.pos[item_id] = len(self.heap) - 1
+        self._up(len(self.heap) - 1)
+
+    def update(self, item_id, priority):
+        i = self.pos[item_id]
+        old = self.heap[i][0]
+        self.heap[i][0] = priority
+        if priority > old:
+            self._up(i)
+        else:
+            self._down(i)
+
+    def remove(self, item_id):
+        i = self.pos.pop(item_id, None)
+        if i is None:
+            return
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.heap[i] = last
+            self.pos[last[1]] = i
+            self._up(i)
+            self._down(self.pos[last[1]])
+
+    def peek(self):
+        return tuple(self.heap[0]) if self.heap else None
+
+    def top(self, k):
+        """The k highest entries, in order, in O(k log k) without touching the heap."""
+        out = []
+        if not self.heap:
+            return out
+        frontier = IndexedHeap()
+        frontier.push(0, self.heap[0][0])
+        while frontier.heap and len(out) < k:
+            priority, i = frontier.heap[0]
+            frontier.remove(i)
+            out.append((priority, self.heap[i][1]))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(self.heap):
+                    frontier.push(child, self.heap[child][0])
+        return out
+
+
+class TriageEngine:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.heap = IndexedHeap()
+        self.district_heaps = {}  # district -> IndexedHeap
+        self.reports = {}   # id -> dict(lat, lon, severity, created_hours, cluster, volunteer_km, district)
+        self.grid = geo.GridIndex()
+        self.volunteers = geo.GridIndex()
+        self.loaded_at = 0.0
+
+    # --- scoring ---
+
+    def _priority(self, r):
+        volunteer = 0.0
+        if r["volunteer_km"] is not None:
+            volunteer = VOLUNTEER_WEIGHT / (1.0 + r["volunteer_km"] / VOLUNTEER_HALF_KM)
+        return (SEVERITY_WEIGHT * r["severity"]
+                + CLUSTER_WEIGHT * math.log1p(r["cluster"])
+                + volunteer
+                - AGE_WEIGHT * r["created_hours"])
+
+    def score(self, priority):
+        """Turn a stored heap priority into the current urgency score."""
+        return priority + AGE_WEIGHT * _hours(None)
+
+    # --- loading ---
+
+    def load(self, db: Session):
+        active = (db.query(models.Task.report_id)
+                  .filter(models.Task.report_id != None)
+                  .filter(models.Task.status.in_(ACTIVE_TASK_STATUSES)))
+        reports = (db.query(models.Report)
+                   .filter(models.Report.status != "resolved")
+                   .filter(models.Report.zone == None)
+                   .filter(models.Report.id.notin_(active))
+                   .all())
+        volunteers = self._free_volunteer_locations(db)
+        with self.lock:
+            self.heap = IndexedHeap()
+            self.district_heaps = {}
+            self.reports = {}
+            self.grid = geo.GridIndex()
+            self.volunteers = geo.GridIndex()
+            for volunteer_id, lat, lon in volunteers:
+                self.volunteers.add(volunteer_id, lat, lon)
+            for report in reports:
+                self._add(report.id, report.latitude, report.longitude, report.severity, report.created_at,
+                          report.district)
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if time.monotonic() - self.loaded_at > RELOAD_INTERVAL:
+            self.load(db)
+
+    def _free_volunteer_locations(self, db: Session):
+        """Volunteers without an active task, at their live GPS position if they
+        have a recent one, otherwise at their most recent task."""
+        busy = {v for (v,) in (db.query(models.Task.volunteer_id)
+                               .filter(models.Task.status.in_(["assigned", "accepted"])))}
+        rows = (db.query(models.Task.volunteer_id, models.Task.latitude, models.Task.longitude)
+                .join(models.User, models.User.id == models.Task.volunteer_id)
+                .filter(models.User.role == "volunteer")
+                .filter(models.Task.latitude != None, models.Task.longitude != None)
+                .order_by(models.Task.created_at.desc())
+                .all())
+        latest = {}
+        for volunteer_id, (lat, lon) in locations.positions.live_positions().items():
+            if volunteer_id not in busy:
+                latest[volunteer_id] = (volunteer_id, lat, lon)
+        for volunteer_id, lat, lon in rows:
+            if volunteer_id not in busy:
+                latest.setdefault(volunteer_id, (volunteer_id, lat, lon))
+        return list(latest.values())
+
+    # --- incremental updates ---
+
+    def _set_priority(self, report_id, r, new=False):
+        priority = self._priority(r)
+        heaps = [self.heap]
+        if r["district"]:
+            heaps.append(self.district_heaps.setdefault(r["district"], IndexedHeap()))
+        for heap in heaps:
+            if new:
+                heap.push(report_id, priority)
+            else:
+                heap.update(report_id, priority)
+
+    def _add(self, report_id, lat, lon, severity, created_at, district=None):
+        if report_id in self.reports:
+            return
+        neighbours = self.grid.within(lat, lon, CLUSTER_KM)
+        nearest = self.volunteers.nearest(lat, lon)
+        r = {
+            "lat": lat, "lon": lon,
+            "severity": severity_value(severity),
+            "created_hours": _hours(created_at),
+            "cluster": len(neighbours),
+            "volunteer_km": nearest[0] if nearest else None,
+            "district": district,
+        }
+        self.reports[report_id] = r
+        self.grid.add(report_id, lat, lon)
+        self._set_priority(report_id, r, new=True)
+        for _, other_id in neighbours:
+            other = self.reports[other_id]
+            other["cluster"] += 1
+            self._set_priority(other_id, other)
+
+    def _remove(self, report_id):
+        r = self.reports.pop(report_id, None)
+        if r is None:
+            return
+        self.grid.remove(report_id)
+        self.heap.remove(report_id)
+        if r["district"]:
+            self.district_heaps[r["district"]].remove(report_id)
+        for _, other_id in self.grid.within(r["lat"], r["lon"], CLUSTER_KM):
+            other = self.reports[other_id]
+            other["cluster"] = max(0, other["cluster"] - 1)
+            self._set_priority(other_id, other)
+
+    def add_report(self, report):
+        """A new report was stored (it starts unassigned)."""
+        with self.lock:
+            self._add(report.id, report.latitude, report.longitude, report.severity, report.created_at,
+                      report.district)
+
+    def add_rows(self, rows):
+        """Reports stored in bulk by the ingestion writer, as column dicts."""
+        with self.lock:
+            for row in rows:
+                self._add(row["id"], row["latitude"], row["longitude"], row["severity"], row["created_at"],
+                          row.get("district"))
+
+    def remove_report(self, report_id):
+        """A report was assigned a task, resolved or deleted."""
+        with self.lock:
+            self._remove(report_id)
+
+    def sync_report(self, db: Session, report_id):
+        """Re-check one report against the database after its task or status changed."""
+        report = db.query(models.Report).filter(models.Report.id == report_id).first()
+        active = (db.query(models.Task.id)
+                  .filter(models.Task.report_id == report_id)
+                  .filter(models.Task.status.in_(ACTIVE_TASK_STATUSES))
+                  .first())
+        with self.lock:
+            if report is None or report.status == "resolved" or report.zone is not None or active:
+                self._remove(report_id)
+            else:
+                self._add(report.id, report.latitude, report.longitude, report.severity, report.created_at,
+                          report.district)
+
+    # --- queries ---
+
+    def _entry(self, priority, report_id):
+        r = self.reports[report_id]
+        return {
+            "report_id": report_id,
+            "score": round(self.score(priority), 2),
+            "cluster_size": r["cluster"],
+            "nearest_volunteer_km": round(r["volunteer_km"], 3) if r["volunteer_km"] is not None else None,
+        }
+
+    def _heap(self, district):
+        if district is None:
+            return self.heap
+        return self.district_heaps.get(district) or IndexedHeap()
+
+    def next(self, district=None):
+        with self.lock:
+            top = self._heap(district).peek()
+            return self._entry(*top) if top else None
+
+    def top(self, k, district=None):
+        with self.lock:
+            return [self._entry(priority, report_id) for priority, report_id in self._heap(district).top(k)]
+
+
+engine = TriageEngine()
@@ -2,7 +2,7 @@ from database import SessionLocal
 from models import User
 import sys
 
-def make_user_district_authority(email):
+def make_user_district_authority(email, district=None):
     db = SessionLocal()
     try:
         user = db.query(User).filter(User.email == email).first()
@@ -12,8 +12,11 @@ def make_user_district_authority(email):
 
         print(f"Found user: {user.name} (Current Role: {user.role})")
         user.role = "district"
+        if district:
+            user.district = district.strip().title()
         db.commit()
-        print(f"Successfully updated {user.name} to 'district' authority.")
+        print(f"Successfully updated {user.name} to 'district' authority"
+              f"{' for ' + user.district if user.district else ''}.")
         
     except Exception as e:
         print(f"Error: {e}")
@@ -22,6 +25,6 @@ def make_user_district_authority(email):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python update_role.py <email>")
+        print("Usage: python update_role.py <email> [district]")
     else:
-        make_user_district_authority(sys.argv[1])
+        make_user_district_authority(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
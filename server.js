@@ -15,6 +15,7 @@ puppeteer.use(StealthPlugin());
 
 const app = express();
 const PORT = process.env.PORT || 5000;
+const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000";
 
 app.use(cors());
 app.use(express.json());
@@ -76,6 +77,26 @@ async function getSmartCoordinates(placeName, district, state) {
 	return null;
 }
 
+// --- 🗺️ BACKEND GEOCODER ---
+// Resolves all names in one call against the backend gazetteer and cache.
+// Returns null if the backend is unreachable.
+async function geocodeBatch(placeNames, district, state) {
+	try {
+		const res = await fetch(`${BACKEND_URL}/api/geocode/batch`, {
+			method: "POST",
+			headers: { "Content-Type": "application/json" },
+			body: JSON.stringify({
+				places: placeNames.map((name) => ({ name, district })),
+				state,
+			}),
+		});
+		if (res.ok) return await res.json();
+	} catch (e) {
+		console.log("     Backend geocoder unavailable, using Nominatim directly");
+	}
+	return null;
+}
+
 // --- GOOGLE NEWS SCRAPER ---
 async function scrapeGoogleNews(query) {
 	console.log(`   ↳ 🕵️ Scraper hunting for: "${query}"...`);
@@ -264,20 +285,37 @@ app.post("/api/floods", async (req, res) => {
 		);
 
 		// 4. Smart Geocoding
+		// Filter out obvious bad matches from AI (Double check)
+		const events = floodEvents.filter(
+			(event) =>
+				!event.location_name.includes("Raichur") &&
+				!event.location_name.includes("Yadgir")
+		);
+		const resolved = await geocodeBatch(
+			events.map((event) => event.location_name),
+			district,
+			state
+		);
+
 		const results = [];
-		for (const event of floodEvents) {
-			// Filter out obvious bad matches from AI (Double check)
-			if (
-				event.location_name.includes("Raichur") ||
-				event.location_name.includes("Yadgir")
-			)
-				continue;
-
-			const coords = await getSmartCoordinates(
-				event.location_name,
-				district,
-				state
-			);
+		for (const [i, event] of events.entries()) {
+			let coords = null;
+			if (resolved) {
+				const hit = resolved[i];
+				if (hit && hit.latitude != null) {
+					coords = {
+						lat: hit.latitude,
+						lng: hit.longitude,
+						display_name: hit.display_name,
+					};
+				}
+			} else {
+				coords = await getSmartCoordinates(
+					event.location_name,
+					district,
+					state
+				);
+			}
 
 			if (coords) {
 				results.push({